@@ -7,18 +7,155 @@ MPPT数据分析与可视化平台
 import streamlit as st
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import os
+import re
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import warnings
 import traceback
 warnings.filterwarnings('ignore')
 
+# scikit-learn为可选依赖：未安装时只停用多元回归分析和趋势预测
+try:
+    from sklearn.linear_model import LinearRegression
+    from sklearn.metrics import mean_absolute_error, r2_score, mean_squared_error
+    from sklearn.preprocessing import StandardScaler
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+try:
+    import xgboost as xgb
+    XGBOOST_AVAILABLE = True
+except ImportError:
+    xgb = None
+    XGBOOST_AVAILABLE = False
+
+
+# 清洗后数据的Parquet缓存目录；修改清洗逻辑后需递增版本号使旧缓存失效
+CLEANED_CACHE_DIR = Path(".cache")
+CLEANED_CACHE_VERSION = 2
+CLEANED_CACHE_MAX_FILES = 64
+
+# 单日Excel文件的Parquet缓存目录（数据目录保持只读）；修改读取逻辑（列筛选、时间解析等）后需递增版本号使旧缓存失效
+EXCEL_CACHE_DIR = CLEANED_CACHE_DIR / "excel"
+EXCEL_CACHE_VERSION = 2
+EXCEL_CACHE_MAX_FILES = 1024
+
+# 采集数据导出的时间格式，显式指定可避免pandas逐行推断格式
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 环境参数仪表板中的时序子图：特征键 -> (行, 列, 名称, 单位)，颜色按顺序取主题色
+ENV_PANEL_LAYOUT = {
+    'temperature': (1, 1, "温度", "°C"),
+    'humidity': (1, 2, "湿度", "%"),
+    'pressure': (1, 3, "气压", "hPa"),
+    'wind_speed': (2, 1, "风速", "m/s"),
+}
+
+
+def _parse_datetime(series: pd.Series) -> pd.Series:
+    """
+    将时间列转换为datetime类型
+    
+    已是datetime类型时直接返回；优先按DATETIME_FORMAT解析，格式不符时回退到自动推断，无法解析的值记为NaT
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    try:
+        return pd.to_datetime(series, format=DATETIME_FORMAT, errors='raise')
+    except (ValueError, TypeError):
+        return pd.to_datetime(series, errors='coerce')
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _load_data_cached(_visualizer, location: str, start_date, end_date) -> Dict[str, Any]:
+    """按(位置, 开始日期, 结束日期)缓存数据加载结果，_visualizer参数不参与缓存键计算"""
+    return _visualizer._load_data(location, start_date, end_date)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _hourly_mean(df: pd.DataFrame, time_col: str) -> pd.DataFrame:
+    """以时间列为索引按小时对数值列求均值，并删除全为NaN的小时；结果按输入数据内容缓存"""
+    numeric_df = df.select_dtypes(include=[np.number]).set_index(df[time_col])
+    return numeric_df.resample('H').mean().dropna(how='all')
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _describe(df: pd.DataFrame) -> pd.DataFrame:
+    """数值列的describe统计（含分位数排序），结果按输入数据内容缓存，重跑时不再重复计算"""
+    return df.describe()
+
+
+@st.cache_data(ttl=3600, max_entries=16, show_spinner=False)
+def _to_csv_bytes(_df: pd.DataFrame, key: Tuple) -> bytes:
+    """
+    将表格导出为带BOM的UTF-8 CSV字节（Excel可直接打开），重跑时不再重复生成
+    
+    缓存只按key（决定表格内容的筛选条件）查找，不对表格本身做哈希，哈希整张表的开销与生成CSV相当
+    """
+    return _df.to_csv(index=False).encode('utf-8-sig')
+
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def _fit_trend_models(X_train: np.ndarray, y_train: np.ndarray,
+                      X_test: np.ndarray, y_test: np.ndarray) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """
+    训练趋势预测模型并在测试集上评估；结果按训练/测试数据内容缓存，重跑时相同数据不再重复训练
+    
+    返回 (各模型的模型对象、测试集预测与MAE/MSE/R², 训练失败的模型及错误信息)
+    """
+    # 训练模型 - 只保留线性回归和XGBoost
+    models = {
+        '线性回归': LinearRegression()
+    }
+    if XGBOOST_AVAILABLE:
+        models['XGBoost'] = xgb.XGBRegressor(n_estimators=50, max_depth=4, learning_rate=0.1, 
+                                           subsample=0.8, colsample_bytree=0.8, 
+                                           random_state=42, verbosity=0)
+    
+    model_results = {}
+    failures = {}
+    for name, model in models.items():
+        try:
+            model.fit(X_train, y_train)
+            y_pred = model.predict(X_test)
+            model_results[name] = {
+                'model': model, 
+                'predictions': y_pred, 
+                'mae': mean_absolute_error(y_test, y_pred), 
+                'mse': mean_squared_error(y_test, y_pred),
+                'r2': r2_score(y_test, y_pred)
+            }
+        except Exception as e:
+            failures[name] = str(e)
+    return model_results, failures
+
+
+def _prune_cache_dir(directory: Path, max_files: int):
+    """只保留目录下最近写入的max_files个Parquet缓存文件，清理失败不影响数据加载"""
+    try:
+        cached = sorted(directory.glob("*.parquet"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in cached[max_files:]:
+            stale.unlink()
+    except Exception:
+        pass
+
+
+def _fragment(func):
+    """将函数包装为Streamlit片段（st.fragment），旧版本Streamlit不支持时原样返回"""
+    decorator = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    return decorator(func) if decorator else func
+
+
 class InteractiveVisualizer:
     """企业级MPPT数据可视化分析平台"""
     
@@ -70,6 +207,19 @@ class InteractiveVisualizer:
             "font_size": 12,            "title_font_size": 16,
             "legend_font_size": 10
         }
+        
+        # 列名识别规则（不区分大小写），各处统一使用，避免关键词列表不一致
+        self._power_re = re.compile(r'power|功率|watt', re.I)
+        self._power_broad_re = re.compile(r'pv|mppt|solar|panel|光伏', re.I)
+        self._current_re = re.compile(r'current|电流|amp', re.I)
+        self._voltage_re = re.compile(r'voltage|电压|volt', re.I)
+        self._temp_re = re.compile(r'温度|temp', re.I)
+        self._radiation_re = re.compile(r'辐射|TBQ|radiation', re.I)
+        # 各位置气象特征列名的联合匹配规则（列名含括号等特殊字符，需转义）
+        self._weather_feature_re = {
+            location: re.compile('|'.join(re.escape(name) for name in features.values() if name))
+            for location, features in self.weather_features.items()
+        }
     
     def setup_page_config(self):
         """设置页面配置"""
@@ -239,6 +389,16 @@ class InteractiveVisualizer:
         """, unsafe_allow_html=True)
     
     def load_data(self, location: str, start_date: datetime, end_date: datetime) -> Dict[str, pd.DataFrame]:
+        """
+        带缓存的数据加载入口
+        
+        数据文件按天存储，因此以(位置, 开始日期, 结束日期)的日期粒度作为缓存键，
+        与日期无关的控件变化（图表类型、异常检测等）不会重新读取文件。
+        st.cache_data每次返回结果的副本，调用方可以直接修改返回的数据。
+        """
+        return _load_data_cached(self, location, start_date.date(), end_date.date())
+    
+    def _load_data(self, location: str, start_date: datetime, end_date: datetime) -> Dict[str, pd.DataFrame]:
         """
         企业级数据加载器，支持多格式数据和错误恢复
         
@@ -259,6 +419,12 @@ class InteractiveVisualizer:
                 "mppt_missing_days": [],
                 "weather_missing_days": [],
                 "data_completeness": 0.0
+            },
+            # 加载时确定一次的关键列，各标签页直接复用，避免重复扫描列名
+            "columns": {
+                "mppt_time": None,
+                "mppt_power": [],
+                "weather_time": None
             }
         }
         
@@ -270,34 +436,12 @@ class InteractiveVisualizer:
             # 加载MPPT数据
             mppt_dir = Path(location) / "filtered"
             if mppt_dir.exists():
-                mppt_files = []
-                missing_mppt_days = []
-                
-                for current_date in date_range:
-                    file_path = mppt_dir / f"{current_date.strftime('%Y-%m-%d')}.xlsx"
-                    if file_path.exists():
-                        mppt_files.append(file_path)
-                    else:
-                        missing_mppt_days.append(current_date.strftime('%Y-%m-%d'))
+                mppt_files, missing_mppt_days = self._find_daily_files(mppt_dir, date_range)
                 
                 if mppt_files:
-                    mppt_dfs = []
-                    for file_path in mppt_files:
-                        try:
-                            df = pd.read_excel(file_path)
-                            if 'eventTime' in df.columns:
-                                df['eventTime'] = pd.to_datetime(df['eventTime'], errors='coerce')
-                                # 添加数据源标识
-                                df['data_source'] = location
-                                df['file_date'] = pd.to_datetime(file_path.stem)
-                            mppt_dfs.append(df)
-                        except Exception as e:
-                            st.warning(f"读取MPPT文件 {file_path.name} 时出错: {e}")
-                    
-                    if mppt_dfs:
-                        data["mppt"] = pd.concat(mppt_dfs, ignore_index=True)
-                        # 数据清洗
-                        data["mppt"] = self.clean_mppt_data(data["mppt"])
+                    data["mppt"] = self._load_cleaned_files(
+                        "mppt", mppt_files, 'eventTime', location, "MPPT", self.clean_mppt_data
+                    )
                 
                 data["data_quality"]["mppt_files_loaded"] = len(mppt_files)
                 data["data_quality"]["mppt_missing_days"] = missing_mppt_days
@@ -305,38 +449,19 @@ class InteractiveVisualizer:
             # 加载气象数据
             weather_dir = Path(location) / "Climate_data" / "filtered"
             if weather_dir.exists():
-                weather_files = []
-                missing_weather_days = []
-                
-                for current_date in date_range:
-                    file_path = weather_dir / f"{current_date.strftime('%Y-%m-%d')}.xlsx"
-                    if file_path.exists():
-                        weather_files.append(file_path)
-                    else:
-                        missing_weather_days.append(current_date.strftime('%Y-%m-%d'))
+                weather_files, missing_weather_days = self._find_daily_files(weather_dir, date_range)
                 
                 if weather_files:
-                    weather_dfs = []
-                    for file_path in weather_files:
-                        try:
-                            df = pd.read_excel(file_path)
-                            if 'Date' in df.columns:
-                                df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-                                # 添加数据源标识
-                                df['data_source'] = location
-                                df['file_date'] = pd.to_datetime(file_path.stem)
-                            weather_dfs.append(df)
-                        except Exception as e:
-                            st.warning(f"读取气象文件 {file_path.name} 时出错: {e}")
-                    
-                    if weather_dfs:
-                        data["weather"] = pd.concat(weather_dfs, ignore_index=True)
-                        # 数据清洗
-                        data["weather"] = self.clean_weather_data(data["weather"], location)
+                    data["weather"] = self._load_cleaned_files(
+                        "weather", weather_files, 'Date', location, "气象",
+                        lambda df: self.clean_weather_data(df, location)
+                    )
                 
                 data["data_quality"]["weather_files_loaded"] = len(weather_files)
                 data["data_quality"]["weather_missing_days"] = missing_weather_days
             
+            self._resolve_columns(data)
+            
             # 计算数据完整性
             loaded_files = data["data_quality"]["mppt_files_loaded"] + data["data_quality"]["weather_files_loaded"]
             expected_files = total_days * 2  # MPPT + Weather
@@ -345,63 +470,175 @@ class InteractiveVisualizer:
         except Exception as e:            st.error(f"数据加载时发生严重错误: {e}")            
         return data
     
+    def _resolve_columns(self, data: Dict[str, Any]):
+        """根据当前的MPPT/气象数据确定时间列和功率列，写入data["columns"]；数据被替换（如聚合）后需重新调用"""
+        mppt_columns = data["mppt"].columns
+        if len(mppt_columns) > 0:
+            data["columns"]["mppt_time"] = 'eventTime' if 'eventTime' in mppt_columns else mppt_columns[0]
+            data["columns"]["mppt_power"] = [col for col in mppt_columns if self._power_re.search(col)]
+        weather_columns = data["weather"].columns
+        if len(weather_columns) > 0:
+            data["columns"]["weather_time"] = 'Date' if 'Date' in weather_columns else weather_columns[0]
+    
+    def _find_daily_files(self, directory: Path, date_range: pd.DatetimeIndex) -> Tuple[List[Path], List[str]]:
+        """
+        查找日期范围内每天的数据文件（YYYY-MM-DD.xlsx）
+        
+        一次性列出目录内容后按文件名匹配，避免逐日检查文件是否存在
+        
+        Returns:
+            (存在的文件路径列表, 缺失日期列表)
+        """
+        with os.scandir(directory) as entries:
+            existing = {entry.name for entry in entries if entry.name.endswith('.xlsx') and entry.is_file()}
+        
+        files = []
+        missing_days = []
+        for day in date_range.strftime('%Y-%m-%d'):
+            file_name = f"{day}.xlsx"
+            if file_name in existing:
+                files.append(directory / file_name)
+            else:
+                missing_days.append(day)
+        return files, missing_days
+    
+    def _read_excel_cached(self, file_path: Path, time_col: str) -> pd.DataFrame:
+        """
+        读取单日Excel文件，并在EXCEL_CACHE_DIR下缓存为Parquet
+        
+        Excel文件始终是数据源：缓存键包含缓存版本号、文件相对路径及其修改时间，文件更新后自动重新读取；
+        缓存读写失败（如目录只读、列类型无法转换）时直接回退到读取Excel
+        """
+        key = hashlib.md5(f"{EXCEL_CACHE_VERSION}|{file_path.as_posix()}|{file_path.stat().st_mtime_ns}".encode()).hexdigest()
+        parquet_path = EXCEL_CACHE_DIR / f"{key}.parquet"
+        try:
+            if parquet_path.exists():
+                return pd.read_parquet(parquet_path)
+        except Exception:
+            pass
+        
+        # 跳过导出时误写入的索引列（Unnamed: N），其余列下游图表和数据表格都会用到
+        # 使用默认的openpyxl引擎；更快的calamine引擎需pandas>=2.2，与当前pandas<2.0的依赖不兼容
+        df = pd.read_excel(file_path, usecols=lambda col: not str(col).startswith('Unnamed:'))
+        if time_col in df.columns:
+            df[time_col] = _parse_datetime(df[time_col])
+        
+        try:
+            EXCEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(parquet_path, compression='zstd')
+        except Exception:
+            pass
+        return df
+    
+    def _load_cleaned_files(self, kind: str, files: List[Path], time_col: str, location: str,
+                            label: str, clean) -> pd.DataFrame:
+        """
+        读取并清洗一组单日数据文件，清洗结果整体缓存为一个Parquet文件
+        
+        缓存键包含两级缓存的版本号、位置、文件名及其修改时间，任一文件更新或日期范围变化都会重新读取；
+        有文件读取失败时不写缓存，以免下次跳过失败提示
+        """
+        signature = "|".join(f"{f.name}:{f.stat().st_mtime_ns}" for f in files)
+        key = hashlib.md5(f"{CLEANED_CACHE_VERSION}|{EXCEL_CACHE_VERSION}|{kind}|{location}|{signature}".encode()).hexdigest()
+        cache_path = CLEANED_CACHE_DIR / f"{kind}_{key}.parquet"
+        try:
+            if cache_path.exists():
+                return pd.read_parquet(cache_path)
+        except Exception:
+            pass
+        
+        df, failed_files = self._read_daily_files(files, time_col, location, label)
+        # 清理过期（文件已更新或版本号已递增）的单日缓存
+        _prune_cache_dir(EXCEL_CACHE_DIR, EXCEL_CACHE_MAX_FILES)
+        if df.empty:
+            return df
+        # 数据清洗
+        df = clean(df)
+        
+        if not failed_files:
+            try:
+                CLEANED_CACHE_DIR.mkdir(exist_ok=True)
+                df.to_parquet(cache_path, compression='zstd')
+                _prune_cache_dir(CLEANED_CACHE_DIR, CLEANED_CACHE_MAX_FILES)
+            except Exception:
+                pass
+        return df
+    
+    def _read_daily_files(self, files: List[Path], time_col: str, location: str,
+                          label: str) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        使用线程池并行读取多个单日数据文件，合并后统一添加数据源标识
+        
+        工作线程中不调用Streamlit接口，读取失败的文件在主线程中统一给出警告并跳过
+        
+        Returns:
+            (合并后的数据, 读取失败的文件名列表)
+        """
+        def read(file_path):
+            try:
+                return self._read_excel_cached(file_path, time_col), None
+            except Exception as e:
+                return None, e
+        
+        with ThreadPoolExecutor(max_workers=min(8, len(files))) as executor:
+            results = list(executor.map(read, files))
+        
+        dfs = []
+        stems = []
+        failed_files = []
+        for file_path, (df, error) in zip(files, results):
+            if error is not None:
+                st.warning(f"读取{label}文件 {file_path.name} 时出错: {error}")
+                failed_files.append(file_path.name)
+            else:
+                dfs.append(df)
+                stems.append(file_path.stem)
+        
+        if not dfs:
+            return pd.DataFrame(), failed_files
+        
+        merged = pd.concat(dfs, ignore_index=True, copy=False)
+        if time_col in merged.columns:
+            # 合并后一次性添加数据源标识，file_date按各文件行数展开
+            merged['data_source'] = location
+            merged['file_date'] = np.repeat(pd.to_datetime(stems, format='%Y-%m-%d'), [len(df) for df in dfs])
+        return merged, failed_files
+    
     def clean_mppt_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """清洗MPPT数据"""
         if df.empty:
             return df
-            
-        df_clean = df.copy()
         
-        # 移除重复行
-        df_clean = df_clean.drop_duplicates()
+        # 移除重复行（drop_duplicates返回新对象，后续修改不会影响传入的df，无需预先复制）
+        df_clean = df.drop_duplicates()
         
         # 处理时间列
         if 'eventTime' in df_clean.columns:
-            df_clean['eventTime'] = pd.to_datetime(df_clean['eventTime'], errors='coerce')
+            df_clean['eventTime'] = _parse_datetime(df_clean['eventTime'])
             df_clean = df_clean.dropna(subset=['eventTime'])
         
-        # 识别功率、电流、电压列
-        power_cols = [col for col in df_clean.columns if any(keyword in col.lower() 
-                     for keyword in ['power', '功率', 'watt', 'pv', 'mppt'])]
-        current_cols = [col for col in df_clean.columns if any(keyword in col.lower() 
-                       for keyword in ['current', '电流', 'amp', 'i_'])]
-        voltage_cols = [col for col in df_clean.columns if any(keyword in col.lower() 
-                       for keyword in ['voltage', '电压', 'volt', 'v_', 'u_'])]
-        
-        # 处理异常值（基于IQR方法，但更宽松）
+        # 数值列只识别一次，异常值标记和降精度共用
         numeric_cols = df_clean.select_dtypes(include=[np.number]).columns
-        for col in numeric_cols:
-            if col not in ['eventTime'] and len(df_clean[col].dropna()) > 5:
-                try:
-                    Q1 = df_clean[col].quantile(0.15)  # 更宽松的分位数
-                    Q3 = df_clean[col].quantile(0.85)
-                    IQR = Q3 - Q1
-                    if IQR > 0:
-                        lower_bound = Q1 - 2.0 * IQR  # 更宽松的异常值范围
-                        upper_bound = Q3 + 2.0 * IQR
-                        
-                        # 标记异常值但保留数据
-                        df_clean[f'{col}_outlier'] = (df_clean[col] < lower_bound) | (df_clean[col] > upper_bound)
-                except Exception as e:                    # 如果某列处理失败，跳过该列
-                    continue
         
+        # 处理异常值（基于IQR方法，但更宽松的分位数和异常值范围），标记异常值但保留数据
+        self._flag_outliers(df_clean, numeric_cols, 0.15, 0.85, 2.0)
+        
+        self._downcast_numeric(df_clean, numeric_cols)
         return df_clean
     
     def clean_weather_data(self, df: pd.DataFrame, location: str) -> pd.DataFrame:
         """清洗气象数据"""
         if df.empty:
             return df
-            
-        df_clean = df.copy()
         
-        # 移除重复行
-        df_clean = df_clean.drop_duplicates()
+        # 移除重复行（drop_duplicates返回新对象，后续修改不会影响传入的df，无需预先复制）
+        df_clean = df.drop_duplicates()
         
         # 处理时间列
         time_cols = ['Date', 'date', 'datetime', 'time']
         for col in time_cols:
             if col in df_clean.columns:
-                df_clean[col] = pd.to_datetime(df_clean[col], errors='coerce')
+                df_clean[col] = _parse_datetime(df_clean[col])
                 break
         
         # 根据位置标准化列名和特征识别
@@ -413,24 +650,52 @@ class InteractiveVisualizer:
                 if actual_name in df_clean.columns:
                     df_clean[f'std_{standard_name}'] = df_clean[actual_name]
         
-        # 处理数值列的异常值
+        # 数值列只识别一次，异常值标记和降精度共用
         numeric_cols = df_clean.select_dtypes(include=[np.number]).columns
-        for col in numeric_cols:
-            if len(df_clean[col].dropna()) > 5:
-                try:
-                    # 使用更宽松的异常值检测
-                    Q1 = df_clean[col].quantile(0.05)
-                    Q3 = df_clean[col].quantile(0.95)
-                    IQR = Q3 - Q1
-                    if IQR > 0:
-                        lower_bound = Q1 - 3.0 * IQR
-                        upper_bound = Q3 + 3.0 * IQR
-                        df_clean[f'{col}_outlier'] = (df_clean[col] < lower_bound) | (df_clean[col] > upper_bound)
-                except Exception:
-                    continue
         
+        # 处理数值列的异常值（使用更宽松的异常值检测）
+        self._flag_outliers(df_clean, numeric_cols, 0.05, 0.95, 3.0)
+        
+        self._downcast_numeric(df_clean, numeric_cols)
         return df_clean
     
+    def _downcast_numeric(self, df: pd.DataFrame, numeric_cols: pd.Index):
+        """
+        将数值列原地降精度：float64转为float32
+        
+        传感器数据有效数字不超过5位，float32足以表示；在异常值标记之后调用，不影响分位数计算。
+        整数列保持int64：压缩为int8/int16后求和、差分等运算会静默溢出
+        """
+        dtypes = df.dtypes[numeric_cols]
+        float_cols = dtypes.index[dtypes == np.float64]
+        if len(float_cols) > 0:
+            df[float_cols] = df[float_cols].astype(np.float32)
+    
+    def _flag_outliers(self, df: pd.DataFrame, numeric_cols: pd.Index, lower_q: float, upper_q: float, k: float):
+        """
+        基于分位距对数值列批量标记异常值，结果写入 {列名}_outlier 布尔列
+        
+        仅处理有效值多于5个且分位距大于0的列；分位数与上下界一次性按列向量化计算
+        """
+        numeric_df = df[numeric_cols]
+        numeric_df = numeric_df.loc[:, numeric_df.count() > 5]
+        if numeric_df.empty:
+            return
+        
+        quantiles = numeric_df.quantile([lower_q, upper_q])
+        q_low = quantiles.loc[lower_q]
+        q_high = quantiles.loc[upper_q]
+        iqr = q_high - q_low
+        cols = iqr.index[iqr > 0]
+        if len(cols) == 0:
+            return
+        
+        values = numeric_df[cols]
+        lower_bound = q_low[cols] - k * iqr[cols]
+        upper_bound = q_high[cols] + k * iqr[cols]
+        outliers = values.lt(lower_bound, axis=1) | values.gt(upper_bound, axis=1)
+        df[[f'{col}_outlier' for col in cols]] = outliers.to_numpy()
+    
     def create_sidebar(self) -> Dict[str, Any]:
         """创建企业级侧边栏控制面板"""
         # 侧边栏标题
@@ -570,7 +835,7 @@ class InteractiveVisualizer:
         
         # 确保时间列为datetime类型
         if time_col in df.columns:
-            df[time_col] = pd.to_datetime(df[time_col], errors='coerce')
+            df[time_col] = _parse_datetime(df[time_col])
             # 移除无效时间数据
             df = df.dropna(subset=[time_col])
         else:
@@ -589,22 +854,20 @@ class InteractiveVisualizer:
         }
         
         if agg_method in freq_map:
-            # 分离数值列和非数值列
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            non_numeric_cols = df.select_dtypes(exclude=[np.number]).columns
-            
-            # 为数值列定义多种聚合统计
-            agg_dict = {}
-            for col in numeric_cols:
-                agg_dict[col] = ['mean', 'max', 'min', 'std', 'count']
-            
-            # 非数值列取第一个值
-            for col in non_numeric_cols:
-                agg_dict[col] = 'first'
-            
-            # 执行聚合
-            df_agg = df.resample(freq_map[agg_method]).agg(agg_dict)
-              # 展平多级列名
+            freq = freq_map[agg_method]
+            numeric_df = df.select_dtypes(include=[np.number])
+            non_numeric_df = df.drop(columns=numeric_df.columns)
+            
+            # 数值列整体计算多种聚合统计，非数值列取第一个值，再按列拼接
+            parts = []
+            if not numeric_df.columns.empty:
+                parts.append(numeric_df.resample(freq).agg(['mean', 'max', 'min', 'std', 'count']))
+            if not non_numeric_df.columns.empty:
+                first_df = non_numeric_df.resample(freq).first()
+                first_df.columns = pd.MultiIndex.from_product([first_df.columns, ['first']])
+                parts.append(first_df)
+            df_agg = pd.concat(parts, axis=1) if parts else df.resample(freq).first()
+            # 展平多级列名
             df_agg.columns = ['_'.join(col).strip() if isinstance(col, tuple) else col 
                              for col in df_agg.columns.values]
             
@@ -627,35 +890,18 @@ class InteractiveVisualizer:
         colors = [self.color_theme["primary"], self.color_theme["secondary"], 
                  self.color_theme["success"], self.color_theme["warning"]]
           # 1. 功率分析仪表板 - 更宽泛的功率列识别
-        power_cols = []
-        
         # 首先尝试精确匹配
-        power_keywords = ['power', '功率', 'watt', 'pv_power', 'mppt_power', 'solar_power']
-        for col in df.columns:
-            if any(keyword in col.lower() for keyword in power_keywords):
-                power_cols.append(col)
+        power_cols = [col for col in df.columns if self._power_re.search(col)]
         
         # 如果没找到功率列，尝试更宽泛的匹配
         if not power_cols:
-            potential_power_cols = []
-            for col in df.columns:
-                if any(keyword in col.lower() for keyword in ['pv', 'mppt', 'solar', 'panel']):
-                    # 检查是否为数值列
-                    if df[col].dtype in ['int64', 'float64']:
-                        potential_power_cols.append(col)
-            
-            # 如果找到了潜在的功率列，取数值范围最大的几个
-            if potential_power_cols:
-                col_ranges = {}
-                for col in potential_power_cols:
-                    try:
-                        col_range = df[col].max() - df[col].min()
-                        col_ranges[col] = col_range
-                    except:
-                        col_ranges[col] = 0
-                
-                # 按数值范围排序，取前3个作为功率列
-                power_cols = sorted(col_ranges.keys(), key=lambda x: col_ranges[x], reverse=True)[:3]
+            potential_power_df = df[[col for col in df.columns if self._power_broad_re.search(col)]]
+            potential_power_df = potential_power_df.select_dtypes(include=[np.number])
+            
+            # 如果找到了潜在的功率列，按数值范围排序，取前3个作为功率列
+            if not potential_power_df.columns.empty:
+                col_ranges = (potential_power_df.max() - potential_power_df.min()).fillna(0)
+                power_cols = col_ranges.sort_values(ascending=False, kind='stable').head(3).index.tolist()
         
         # 如果仍然没找到，使用所有数值列
         if not power_cols:
@@ -677,24 +923,26 @@ class InteractiveVisualizer:
                 vertical_spacing=0.12,
                 horizontal_spacing=0.1
             )
+            placed = []  # (轨迹, 行, 列)，全部收集后一次性添加到子图
             
             # 时序图
             for i, col in enumerate(power_cols[:3]):  # 最多显示3个功率列
-                fig.add_trace(
+                x_ds, y_ds = self._downsample(df[time_col], df[col])
+                placed.append((
                     go.Scatter(
-                        x=df[time_col], 
-                        y=df[col], 
+                        x=x_ds,
+                        y=y_ds,
                         name=col,
                         line=dict(color=colors[i % len(colors)], width=2),
                         mode='lines',
                         hovertemplate=f"<b>{col}</b><br>时间: %{{x}}<br>功率: %{{y:.2f}}W<extra></extra>"
                     ),
-                    row=1, col=1
-                )
+                    1, 1
+                ))
             
             # 功率分布直方图
             if len(power_cols) > 0:
-                fig.add_trace(
+                placed.append((
                     go.Histogram(
                         x=df[power_cols[0]], 
                         nbinsx=30,
@@ -702,33 +950,36 @@ class InteractiveVisualizer:
                         marker_color=self.color_theme["info"],
                         opacity=0.7
                     ),
-                    row=1, col=2
-                )
+                    1, 2
+                ))
             
             # 箱线图
             for i, col in enumerate(power_cols[:3]):
-                fig.add_trace(
+                placed.append((
                     go.Box(
                         y=df[col], 
                         name=col,
                         marker_color=colors[i % len(colors)],
                         boxpoints='outliers'
                     ),
-                    row=2, col=1
-                )
+                    2, 1
+                ))
             
             # 实时功率指示器
             if len(power_cols) > 0:
-                current_power = df[power_cols[0]].iloc[-1] if len(df) > 0 else 0
-                max_power = df[power_cols[0]].max() if len(df) > 0 else 100
+                # 一次取出功率数组，当前值、最大值、均值均基于该数组计算（忽略缺失值）
+                power_values = df[power_cols[0]].to_numpy(dtype=np.float64)
+                current_power = power_values[-1] if power_values.size else 0
+                max_power = np.nanmax(power_values) if power_values.size else 100
+                mean_power = np.nanmean(power_values) if power_values.size else 0
                 
-                fig.add_trace(
+                placed.append((
                     go.Indicator(
                         mode="gauge+number+delta",
                         value=current_power,
                         domain={'x': [0, 1], 'y': [0, 1]},
                         title={'text': "当前功率 (W)"},
-                        delta={'reference': df[power_cols[0]].mean()},
+                        delta={'reference': mean_power},
                         gauge={
                             'axis': {'range': [None, max_power]},
                             'bar': {'color': self.color_theme["primary"]},
@@ -743,10 +994,13 @@ class InteractiveVisualizer:
                             }
                         }
                     ),
-                    row=2, col=2
-                )
+                    2, 2
+                ))
+            
+            self._add_placed_traces(fig, placed)
             
             fig.update_layout(
+                uirevision=location,  # 同一位置的重跑保持缩放/图例等交互状态
                 height=800,
                 title_text=f"⚡ MPPT功率综合分析仪表板 - {location}",
                 title_font_size=18,
@@ -756,10 +1010,8 @@ class InteractiveVisualizer:
             charts.append(fig)
         
         # 2. 电流电压分析
-        current_cols = [col for col in df.columns if any(keyword in col.lower() 
-                       for keyword in ['current', '电流', 'amp'])]
-        voltage_cols = [col for col in df.columns if any(keyword in col.lower() 
-                       for keyword in ['voltage', '电压', 'volt'])]
+        current_cols = [col for col in df.columns if self._current_re.search(col)]
+        voltage_cols = [col for col in df.columns if self._voltage_re.search(col)]
         
         if current_cols or voltage_cols:
             rows = max(len(current_cols), len(voltage_cols), 1)
@@ -768,36 +1020,42 @@ class InteractiveVisualizer:
                 subplot_titles=[f"🔋 电流监控 - {location}", f"⚡ 电压监控 - {location}"] * rows,
                 vertical_spacing=0.08
             )
+            placed = []  # (轨迹, 行, 列)，全部收集后一次性添加到子图
             
             # 电流图表
             for i, col in enumerate(current_cols):
-                fig.add_trace(
+                x_ds, y_ds = self._downsample(df[time_col], df[col])
+                placed.append((
                     go.Scatter(
-                        x=df[time_col], 
-                        y=df[col], 
+                        x=x_ds,
+                        y=y_ds,
                         name=col,
                         line=dict(color=colors[i % len(colors)], width=2),
                         mode='lines+markers',
                         marker_size=3
                     ),
-                    row=i+1, col=1
-                )
+                    i+1, 1
+                ))
             
             # 电压图表
             for i, col in enumerate(voltage_cols):
-                fig.add_trace(
+                x_ds, y_ds = self._downsample(df[time_col], df[col])
+                placed.append((
                     go.Scatter(
-                        x=df[time_col], 
-                        y=df[col], 
+                        x=x_ds,
+                        y=y_ds,
                         name=col,
                         line=dict(color=colors[(i+2) % len(colors)], width=2),
                         mode='lines+markers',
                         marker_size=3
                     ),
-                    row=i+1, col=2
-                )
+                    i+1, 2
+                ))
+            
+            self._add_placed_traces(fig, placed)
             
             fig.update_layout(
+                uirevision=location,
                 height=400*rows,
                 title_text=f"🔋 MPPT电流电压分析 - {location}",
                 template="plotly_white"
@@ -812,6 +1070,83 @@ class InteractiveVisualizer:
         
         return charts
     
+    def _pearson_corr(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        计算Pearson相关系数矩阵，无缺失值时直接用np.corrcoef一次算出
+        
+        存在缺失值时回退到DataFrame.corr()，保持按列对成对剔除缺失值的语义
+        """
+        values = df.to_numpy(dtype=np.float64)
+        if np.isnan(values).any():
+            return df.corr()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = np.corrcoef(values, rowvar=False)
+        return pd.DataFrame(np.atleast_2d(corr), index=df.columns, columns=df.columns)
+    
+    def _add_placed_traces(self, fig: go.Figure, placed: List[tuple]):
+        """将收集的(轨迹, 行, 列)一次性添加到子图，避免逐条add_trace重复校验和布局更新"""
+        if placed:
+            traces, rows, cols = zip(*placed)
+            fig.add_traces(list(traces), rows=list(rows), cols=list(cols))
+    
+    def _downsample(self, x, y, max_points: int = 4000):
+        """
+        使用LTTB算法将序列抽样到不超过max_points个点，减少传给浏览器的图表数据量，同时保留峰谷形状
+        
+        x、y为等长的Series，返回抽样后的Series (x, y)；点数未超过上限时原样返回。
+        保持Series而非转为numpy数组，时间列序列化为JSON时不会带上纳秒精度的冗长字符串；
+        float64的y值转为float32，绘图无需双精度，图表JSON体积更小
+        """
+        if y.dtype == np.float64:
+            y = y.astype(np.float32)
+        if len(y) <= max_points:
+            return x, y
+        x_values = x.to_numpy()
+        if np.issubdtype(x_values.dtype, np.datetime64):
+            x_values = x_values.view(np.int64)
+        elif not np.issubdtype(x_values.dtype, np.number):
+            # 非数值、非时间的横轴按位置等距处理
+            x_values = np.arange(len(x_values))
+        idx = self._lttb_indices(x_values.astype(np.float64), y.to_numpy(dtype=np.float64), max_points)
+        return x.iloc[idx], y.iloc[idx]
+    
+    def _lttb_indices(self, x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+        """
+        LTTB（Largest-Triangle-Three-Buckets）降采样，返回保留点的位置索引
+        
+        首尾点固定保留，中间点均分为n_out-2个桶，每个桶保留与前一桶均值点、后一桶均值点
+        构成三角形面积最大的点。前一桶取均值点而非已选点，使所有桶可一次性向量化计算；
+        缺失值不会被选中（整桶缺失时取桶内第一个点）
+        """
+        n = len(y)
+        starts = np.linspace(1, n - 1, n_out - 1).astype(np.int64)[:-1]
+        sizes = np.diff(np.append(starts, n - 1))
+        bucket = np.repeat(np.arange(len(starts)), sizes)
+        
+        # 各桶均值点（忽略缺失值）
+        valid = ~np.isnan(y)
+        counts = np.add.reduceat(valid[:n - 1], starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            y_mean = np.add.reduceat(np.where(valid, y, 0.0)[:n - 1], starts) / counts
+        x_mean = np.add.reduceat(x[:n - 1], starts) / sizes
+        
+        # 每个桶的三角形另外两个顶点：前一桶均值点（首桶为首点）、后一桶均值点（末桶为尾点）
+        ax = np.append(x[0], x_mean[:-1])[bucket]
+        ay = np.append(y[0], y_mean[:-1])[bucket]
+        cx = np.append(x_mean[1:], x[-1])[bucket]
+        cy = np.append(y_mean[1:], y[-1])[bucket]
+        bx = x[1:n - 1]
+        by = y[1:n - 1]
+        area = np.abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))
+        area = np.where(np.isnan(area), -1.0, area)
+        
+        # 每个桶取面积最大的第一个点
+        is_max = area == np.maximum.reduceat(area, starts - 1)[bucket]
+        candidates = np.flatnonzero(is_max)
+        _, first = np.unique(bucket[candidates], return_index=True)
+        chosen = candidates[first] + 1
+        return np.concatenate(([0], chosen, [n - 1]))
+    
     def create_anomaly_detection_chart(self, df: pd.DataFrame, time_col: str, location: str) -> Optional[go.Figure]:
         """创建异常检测图表"""
         try:
@@ -824,33 +1159,35 @@ class InteractiveVisualizer:
                 subplot_titles=[f"🚨 {col} 异常检测" for col in numeric_cols[:3]],
                 vertical_spacing=0.1
             )
+            placed = []  # (轨迹, 行, 列)，全部收集后一次性添加到子图
             
             for i, col in enumerate(numeric_cols[:3]):
-                # 计算异常值（使用IQR方法）
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
+                # 计算异常值（使用IQR方法，一次计算两个分位数，缺失值既不算正常也不算异常）
+                values = df[col].to_numpy(dtype=np.float64)
+                Q1, Q3 = np.nanpercentile(values, [25, 75])
                 IQR = Q3 - Q1
                 lower_bound = Q1 - 1.5 * IQR
                 upper_bound = Q3 + 1.5 * IQR
                 
-                # 正常值
-                normal_mask = (df[col] >= lower_bound) & (df[col] <= upper_bound)
-                fig.add_trace(
+                # 正常值（点数较多时抽样显示，异常值全部保留）
+                normal_mask = (values >= lower_bound) & (values <= upper_bound)
+                x_ds, y_ds = self._downsample(df[time_col][normal_mask], df[col][normal_mask])
+                placed.append((
                     go.Scatter(
-                        x=df[time_col][normal_mask], 
-                        y=df[col][normal_mask],
+                        x=x_ds, 
+                        y=y_ds,
                         mode='markers',
                         name=f"{col} (正常)",
                         marker=dict(color=self.color_theme["success"], size=4),
                         opacity=0.7
                     ),
-                    row=i+1, col=1
-                )
+                    i+1, 1
+                ))
                 
                 # 异常值
-                anomaly_mask = (df[col] < lower_bound) | (df[col] > upper_bound)
+                anomaly_mask = ~normal_mask & ~np.isnan(values)
                 if anomaly_mask.any():
-                    fig.add_trace(
+                    placed.append((
                         go.Scatter(
                             x=df[time_col][anomaly_mask], 
                             y=df[col][anomaly_mask],
@@ -858,10 +1195,13 @@ class InteractiveVisualizer:
                             name=f"{col} (异常)",
                             marker=dict(color=self.color_theme["warning"], size=8, symbol='x'),
                         ),
-                        row=i+1, col=1
-                    )
+                        i+1, 1
+                    ))
+            
+            self._add_placed_traces(fig, placed)
             
             fig.update_layout(
+                uirevision=location,
                 height=300*min(len(numeric_cols), 3),
                 title_text=f"🚨 异常值检测分析 - {location}",
                 template="plotly_white"
@@ -909,74 +1249,33 @@ class InteractiveVisualizer:
             vertical_spacing=0.12,
             horizontal_spacing=0.1
         )
-        
-        # 温度
-        if features.get('temperature') and features['temperature'] in df.columns:
-            temp_col = features['temperature']
-            fig_env.add_trace(
-                go.Scatter(
-                    x=df[time_col], 
-                    y=df[temp_col],
-                    name="温度",
-                    line=dict(color=colors[0], width=2),
-                    mode='lines',
-                    hovertemplate="<b>温度</b><br>时间: %{x}<br>温度: %{y:.1f}°C<extra></extra>"
-                ),
-                row=1, col=1
-            )
-        
-        # 湿度
-        if features.get('humidity') and features['humidity'] in df.columns:
-            humidity_col = features['humidity']
-            fig_env.add_trace(
-                go.Scatter(
-                    x=df[time_col], 
-                    y=df[humidity_col],
-                    name="湿度",
-                    line=dict(color=colors[1], width=2),
-                    mode='lines',
-                    hovertemplate="<b>湿度</b><br>时间: %{x}<br>湿度: %{y:.1f}%<extra></extra>"
-                ),
-                row=1, col=2
-            )
-        
-        # 气压
-        if features.get('pressure') and features['pressure'] in df.columns:
-            pressure_col = features['pressure']
-            fig_env.add_trace(
-                go.Scatter(
-                    x=df[time_col], 
-                    y=df[pressure_col],
-                    name="气压",
-                    line=dict(color=colors[2], width=2),
-                    mode='lines',
-                    hovertemplate="<b>气压</b><br>时间: %{x}<br>气压: %{y:.1f}hPa<extra></extra>"
-                ),
-                row=1, col=3
-            )
-        
-        # 风速
-        if features.get('wind_speed') and features['wind_speed'] in df.columns:
-            wind_speed_col = features['wind_speed']
-            fig_env.add_trace(
+        placed = []  # (轨迹, 行, 列)，全部收集后一次性添加到子图
+        
+        # 温度、湿度、气压、风速时序
+        for i, (feature, (row, col, name, unit)) in enumerate(ENV_PANEL_LAYOUT.items()):
+            feature_col = features.get(feature)
+            if not feature_col or feature_col not in df.columns:
+                continue
+            x_ds, y_ds = self._downsample(df[time_col], df[feature_col])
+            placed.append((
                 go.Scatter(
-                    x=df[time_col], 
-                    y=df[wind_speed_col],
-                    name="风速",
-                    line=dict(color=colors[3], width=2),
+                    x=x_ds,
+                    y=y_ds,
+                    name=name,
+                    line=dict(color=colors[i], width=2),
                     mode='lines',
-                    hovertemplate="<b>风速</b><br>时间: %{x}<br>风速: %{y:.1f}m/s<extra></extra>"
+                    hovertemplate=f"<b>{name}</b><br>时间: %{{x}}<br>{name}: %{{y:.1f}}{unit}<extra></extra>"
                 ),
-                row=2, col=1
-            )
+                row, col
+            ))
           # 风向玫瑰图
         if (features.get('wind_direction') and features['wind_direction'] in df.columns and
             features.get('wind_speed') and features['wind_speed'] in df.columns):
             wind_dir_col = features['wind_direction']
             wind_speed_col = features['wind_speed']
             
-            fig_env.add_trace(
-                go.Scatterpolar(
+            placed.append((
+                go.Scatterpolargl(
                     r=df[wind_speed_col],
                     theta=df[wind_dir_col],
                     mode='markers',
@@ -984,11 +1283,11 @@ class InteractiveVisualizer:
                     marker=dict(color=df[wind_speed_col], colorscale='Viridis', size=8),
                     hovertemplate="<b>风向风速</b><br>风向: %{theta}°<br>风速: %{r:.1f}m/s<extra></extra>"
                 ),
-                row=2, col=2
-            )
+                2, 2
+            ))
         
         # 环境参数相关性热力图
-        numeric_cols = [col for col in df.columns if df[col].dtype in ['float64', 'int64'] and col != time_col]
+        numeric_cols = [col for col in df.select_dtypes(include=[np.number]).columns if col != time_col]
         env_params = []
         
         # 收集可用的环境参数
@@ -1004,9 +1303,9 @@ class InteractiveVisualizer:
         if len(env_params) >= 2:
             # 计算相关性矩阵
             try:
-                corr_matrix = df[env_params].corr()
+                corr_matrix = self._pearson_corr(df[env_params])
                 
-                fig_env.add_trace(
+                placed.append((
                     go.Heatmap(
                         z=corr_matrix.values,
                         x=corr_matrix.columns,
@@ -1020,8 +1319,8 @@ class InteractiveVisualizer:
                         showscale=True,
                         colorbar=dict(title="相关系数", x=1.02)
                     ),
-                    row=2, col=3
-                )
+                    2, 3
+                ))
             except Exception as e:
                 st.warning(f"计算环境参数相关性时出错: {e}")
         else:
@@ -1034,7 +1333,10 @@ class InteractiveVisualizer:
                 font=dict(size=14, color="gray")
             )
         
+        self._add_placed_traces(fig_env, placed)
+        
         fig_env.update_layout(
+            uirevision=location,
             height=800,
             title_text=f"🌤️ 环境参数综合监控 - {location}",
             template="plotly_white",
@@ -1057,63 +1359,70 @@ class InteractiveVisualizer:
                     ] + ([f"📈 PM指标趋势 - {location}", f"🌞 辐射累计分析 - {location}"] if rows == 2 else []),
                     vertical_spacing=0.15
                 )
+                placed = []  # (轨迹, 行, 列)，全部收集后一次性添加到子图
                 
                 # PM指标
                 for i, col in enumerate(pm_cols[:3]):
-                    fig_special.add_trace(
+                    x_ds, y_ds = self._downsample(df[time_col], df[col])
+                    placed.append((
                         go.Scatter(
-                            x=df[time_col], 
-                            y=df[col],
+                            x=x_ds,
+                            y=y_ds,
                             name=col,
                             line=dict(color=colors[i % len(colors)], width=2),
                             mode='lines'
                         ),
-                        row=1, col=1
-                    )
+                        1, 1
+                    ))
                 
                 # 辐射指标
                 for i, col in enumerate(radiation_cols[:2]):
-                    fig_special.add_trace(
+                    x_ds, y_ds = self._downsample(df[time_col], df[col])
+                    placed.append((
                         go.Scatter(
-                            x=df[time_col], 
-                            y=df[col],
+                            x=x_ds,
+                            y=y_ds,
                             name=col,
                             line=dict(color=colors[(i+3) % len(colors)], width=2),
                             mode='lines'
                         ),
-                        row=1, col=2
-                    )
+                        1, 2
+                    ))
                 
                 # 如果有足够数据，添加趋势分析
                 if rows == 2 and len(pm_cols) > 0:
                     # PM指标箱线图
                     for i, col in enumerate(pm_cols[:3]):
-                        fig_special.add_trace(
+                        placed.append((
                             go.Box(
-                                y=df[col], 
+                                y=df[col].astype(np.float32, copy=False),
                                 name=col,
                                 marker_color=colors[i % len(colors)],
                                 boxpoints='outliers'
                             ),
-                            row=2, col=1
-                        )
+                            2, 1
+                        ))
                     
                     # 辐射累计分析
                     if features.get('radiation_cum') and features['radiation_cum'] in df.columns:
                         cum_col = features['radiation_cum']
-                        fig_special.add_trace(
+                        x_ds, y_ds = self._downsample(df[time_col], df[cum_col])
+                        placed.append((
                             go.Scatter(
-                                x=df[time_col], 
-                                y=df[cum_col],
+                                x=x_ds,
+                                y=y_ds,
                                 name="辐射累计",
                                 line=dict(color=colors[5], width=3),
                                 mode='lines',
                                 fill='tonexty'
                             ),
-                            row=2, col=2
-                        )
+                            2, 2
+                        ))
                         
+                self._add_placed_traces(fig_special, placed)
+                
                 fig_special.update_layout(
+                    uirevision=location,
                     height=400*rows,
                     title_text=f"🏭 专教特有环境指标分析",
                     template="plotly_white"
@@ -1144,15 +1453,17 @@ class InteractiveVisualizer:
                        [{"type": "histogram"}, {"type": "scatter"}]],
                 vertical_spacing=0.15
             )
+            placed = []  # (轨迹, 行, 列)，全部收集后一次性添加到子图
             
-            # 数据完整性
+            # 数据完整性（所有参数列一次性统计非空数量）
+            available = {param: col_name for param, col_name in features.items() if col_name in df.columns}
             completeness = {}
-            for param, col_name in features.items():
-                if col_name in df.columns:
-                    completeness[param] = (df[col_name].notna().sum() / len(df)) * 100
+            if available:
+                valid_counts = df[list(available.values())].notna().sum(axis=0).to_numpy()
+                completeness = dict(zip(available.keys(), valid_counts * (100.0 / len(df))))
             
             if completeness:
-                fig.add_trace(
+                placed.append((
                     go.Bar(
                         x=list(completeness.keys()),
                         y=list(completeness.values()),
@@ -1161,27 +1472,30 @@ class InteractiveVisualizer:
                         text=[f"{v:.1f}%" for v in completeness.values()],
                         textposition='auto'
                     ),
-                    row=1, col=1
-                )
+                    1, 1
+                ))
             
             # 数据变化率（以温度为例）
             if features.get('temperature') and features['temperature'] in df.columns:
                 temp_col = features['temperature']
-                df_temp = df.copy()
-                df_temp['temp_change'] = df_temp[temp_col].diff().abs()
+                temp_change = df[temp_col].diff().abs()
+                x_ds, y_ds = self._downsample(df[time_col], temp_change)
                 
-                fig.add_trace(
+                placed.append((
                     go.Scatter(
-                        x=df_temp[time_col],
-                        y=df_temp['temp_change'],
+                        x=x_ds,
+                        y=y_ds,
                         name="温度变化率",
                         line=dict(color=self.color_theme["warning"]),
                         mode='lines'
                     ),
-                    row=1, col=2
-                )
+                    1, 2
+                ))
+            
+            self._add_placed_traces(fig, placed)
             
             fig.update_layout(
+                uirevision=location,
                 height=600,                title_text=f"📊 气象数据质量分析 - {location}",
                 template="plotly_white"            )
             
@@ -1203,12 +1517,11 @@ class InteractiveVisualizer:
             mppt_time_col = 'eventTime' if 'eventTime' in mppt_df.columns else mppt_df.columns[0]
             weather_time_col = 'Date' if 'Date' in weather_df.columns else weather_df.columns[0]
             
-            # 转换时间格式并进行时间对齐
-            mppt_df = mppt_df.copy()
-            weather_df = weather_df.copy()
-            
-            mppt_df[mppt_time_col] = pd.to_datetime(mppt_df[mppt_time_col], errors='coerce')
-            weather_df[weather_time_col] = pd.to_datetime(weather_df[weather_time_col], errors='coerce')
+            # 转换时间格式并进行时间对齐（加载时已转换为datetime的列不再复制和解析）
+            if not pd.api.types.is_datetime64_any_dtype(mppt_df[mppt_time_col]):
+                mppt_df = mppt_df.assign(**{mppt_time_col: _parse_datetime(mppt_df[mppt_time_col])})
+            if not pd.api.types.is_datetime64_any_dtype(weather_df[weather_time_col]):
+                weather_df = weather_df.assign(**{weather_time_col: _parse_datetime(weather_df[weather_time_col])})
             
             # 删除时间转换失败的行
             mppt_df = mppt_df.dropna(subset=[mppt_time_col])
@@ -1227,40 +1540,24 @@ class InteractiveVisualizer:
                 st.error("❌ 相关性分析出错: 数据中缺少数值列")
                 return None
             
-            # 将时间列重新添加到数值数据中
-            mppt_with_time = mppt_numeric.copy()
-            weather_with_time = weather_numeric.copy()
-            
-            mppt_with_time[mppt_time_col] = mppt_df[mppt_time_col]
-            weather_with_time[weather_time_col] = weather_df[weather_time_col]
-            
-            # 按小时聚合数据以便对齐（只对数值列聚合）
+            # 按小时聚合数据以便对齐（只对数值列聚合，结果按输入数据缓存）
             try:
-                # 设置时间为索引并进行重采样聚合
-                mppt_hourly = mppt_with_time.set_index(mppt_time_col).resample('H').mean()
-                weather_hourly = weather_with_time.set_index(weather_time_col).resample('H').mean()
-                
-                # 删除全为NaN的行
-                mppt_hourly = mppt_hourly.dropna(how='all')
-                weather_hourly = weather_hourly.dropna(how='all')
-                
+                mppt_hourly = _hourly_mean(mppt_df, mppt_time_col)
+                weather_hourly = _hourly_mean(weather_df, weather_time_col)
             except Exception as e:
                 st.error(f"❌ 相关性分析出错: 数据聚合失败 - {e}")
                 return None
             
             # 合并数据 - 使用内连接确保时间完全匹配
             try:
-                combined_df = pd.merge(
-                    mppt_hourly, 
-                    weather_hourly, 
-                    left_index=True, 
-                    right_index=True, 
-                    how='inner',
-                    suffixes=('_mppt', '_weather')
-                )
+                combined_df = mppt_hourly.join(weather_hourly, how='inner', lsuffix='_mppt', rsuffix='_weather')
                 
                 # 删除包含NaN的行
                 combined_df = combined_df.dropna()
+                # 两侧都是按小时重采样的结果，连接后通常已按时间升序；仅在例外情况下排序，
+                # 保证时序轨迹的横轴单调，浏览器端无需重新排序
+                if not combined_df.index.is_monotonic_increasing:
+                    combined_df = combined_df.sort_index()
                 
             except Exception as e:
                 st.error(f"❌ 相关性分析出错: 数据合并失败 - {e}")
@@ -1290,42 +1587,31 @@ class InteractiveVisualizer:
                 horizontal_spacing=0.12,
                 row_heights=[0.25, 0.35, 0.4]  # 调整行高比例
             )
+            placed = []  # (轨迹, 行, 列)，全部收集后一次性添加到子图
             
             # 获取功率列 - 更宽泛的识别
-            power_cols = []
-            
             # 首先尝试精确匹配
-            power_keywords = ['power', '功率', 'watt', 'pv_power', 'mppt_power', 'solar_power']
-            for col in combined_df.columns:
-                if any(keyword in col.lower() for keyword in power_keywords):
-                    power_cols.append(col)
+            power_cols = [col for col in combined_df.columns if self._power_re.search(col)]
             
             # 如果没找到，尝试更宽泛的匹配
             if not power_cols:
-                for col in combined_df.columns:
-                    if any(keyword in col.lower() for keyword in ['pv', 'mppt', 'solar', 'panel']):
-                        # 检查是否为数值列且有合理的数值范围
-                        if pd.api.types.is_numeric_dtype(combined_df[col]):
-                            col_std = combined_df[col].std()
-                            if col_std > 0:  # 确保有变化
-                                power_cols.append(col)
+                # 只考虑数值列（按dtype.kind判断），并要求数值有变化
+                broad_cols = [col for col in combined_df.columns
+                              if self._power_broad_re.search(col) and combined_df[col].dtype.kind in 'iufb']
+                if broad_cols:
+                    broad_stds = combined_df[broad_cols].std()
+                    power_cols = broad_stds.index[broad_stds > 0].tolist()
             
             # 如果仍然没找到，使用最有变化的数值列
             if not power_cols:
-                numeric_cols = combined_df.select_dtypes(include=[np.number]).columns
-                if len(numeric_cols) > 0:
+                col_stds = combined_df.select_dtypes(include=[np.number]).std().fillna(0)
+                if len(col_stds) > 0:
                     # 选择标准差最大的列作为功率列
-                    col_stds = {}
-                    for col in numeric_cols:
-                        try:
-                            col_stds[col] = combined_df[col].std()
-                        except:
-                            col_stds[col] = 0
-                    power_cols = [max(col_stds, key=col_stds.get)] if col_stds else []
+                    power_cols = [col_stds.idxmax()]
             
             # 获取环境参数列
-            features = self.weather_features.get(location, {})
-            env_cols = [col for col in combined_df.columns if any(feat in col for feat in features.values() if feat)]
+            feature_re = self._weather_feature_re.get(location)
+            env_cols = [col for col in combined_df.columns if feature_re.search(col)] if feature_re else []
             
             # 如果通过特征匹配找不到，则直接使用数值列
             if not env_cols:
@@ -1350,35 +1636,34 @@ class InteractiveVisualizer:
             if valid_indices.sum() < 3:
                 st.error("❌ 相关性分析出错: 有效数据点不足")
                 return None            # 1. 功率时间序列
-            fig.add_trace(
+            valid_df = combined_df[valid_indices]
+            x_ds, y_ds = self._downsample(valid_df.index.to_series(), valid_df[power_col])
+            placed.append((
                 go.Scatter(
-                    x=combined_df.index[valid_indices],
-                    y=combined_df[power_col][valid_indices],
+                    x=x_ds,
+                    y=y_ds,
                     name="MPPT功率",
                     line=dict(color=self.color_theme["primary"], width=2),
                     yaxis="y1"
                 ),
-                row=1, col=1
-            )
+                1, 1
+            ))
             
             # 温度时间序列
-            temp_col = None
-            for col in combined_df.columns:
-                if '温度' in col or 'temp' in col.lower():
-                    temp_col = col
-                    break
+            temp_col = next((col for col in combined_df.columns if self._temp_re.search(col)), None)
             
             if temp_col and temp_col in combined_df.columns:
-                fig.add_trace(
+                x_ds, y_ds = self._downsample(valid_df.index.to_series(), valid_df[temp_col])
+                placed.append((
                     go.Scatter(
-                        x=combined_df.index[valid_indices],
-                        y=combined_df[temp_col][valid_indices],
+                        x=x_ds,
+                        y=y_ds,
                         name="环境温度",
                         line=dict(color=self.color_theme["warning"], width=2),
                         yaxis="y2"
                     ),
-                    row=1, col=1
-                )
+                    1, 1
+                ))
               # 2. 相关性热力图
             corr_cols = [power_col] + env_cols[:5]  # 限制显示前5个环境参数
             # 确保所有列都存在
@@ -1386,9 +1671,9 @@ class InteractiveVisualizer:
             
             if len(corr_cols) >= 2:
                 try:
-                    corr_data = combined_df[corr_cols].corr();
+                    corr_data = self._pearson_corr(combined_df[corr_cols])
                     
-                    fig.add_trace(
+                    placed.append((
                         go.Heatmap(
                             z=corr_data.values,
                             x=corr_data.columns,
@@ -1401,21 +1686,22 @@ class InteractiveVisualizer:
                             hovertemplate="<b>%{x}</b> vs <b>%{y}</b><br>相关系数: %{z:.3f}<extra></extra>",
                             showscale=False  # 隐藏颜色条以节省空间
                         ),
-                        row=1, col=2
-                    )
+                        1, 2
+                    ))
                 except Exception as e:
                     st.warning(f"⚠️ 相关性热力图生成失败: {e}")
               # 3. 功率vs温度散点图
             if temp_col and temp_col in combined_df.columns:
                 try:
-                    # 过滤有效数据
-                    scatter_data = combined_df[[power_col, temp_col]].dropna()
+                    # 过滤有效数据：两列一次转为数组，用np.isfinite得到单个掩码
+                    pair = combined_df[[power_col, temp_col]].to_numpy(dtype=np.float64)
+                    valid_mask = np.isfinite(pair).all(axis=1)
                     
-                    if len(scatter_data) >= 3:
-                        fig.add_trace(
-                            go.Scatter(
-                                x=scatter_data[temp_col],
-                                y=scatter_data[power_col],
+                    if valid_mask.sum() >= 3:
+                        placed.append((
+                            go.Scattergl(
+                                x=combined_df[temp_col][valid_mask],
+                                y=combined_df[power_col][valid_mask],
                                 mode='markers',
                                 name="功率-温度",
                                 marker=dict(
@@ -1426,44 +1712,43 @@ class InteractiveVisualizer:
                                 hovertemplate="<b>温度</b>: %{x:.1f}°C<br><b>功率</b>: %{y:.2f}W<extra></extra>",
                                 showlegend=False  # 不显示在图例中
                             ),
-                            row=2, col=1
-                        )
+                            2, 1
+                        ))
                         
                         # 添加趋势线
-                        if len(scatter_data) >= 2:
-                            z = np.polyfit(scatter_data[temp_col], scatter_data[power_col], 1)
-                            p = np.poly1d(z)
+                        if valid_mask.sum() >= 2:
+                            # 趋势线为直线，只需绘制数据范围两端的两个点
+                            x_fit = pair[valid_mask, 1]
+                            slope, intercept = np.polyfit(x_fit, pair[valid_mask, 0], 1)
+                            x_ends = np.array([x_fit.min(), x_fit.max()])
                             
-                            fig.add_trace(
-                                go.Scatter(
-                                    x=scatter_data[temp_col],
-                                    y=p(scatter_data[temp_col]),
+                            placed.append((
+                                go.Scattergl(
+                                    x=x_ends,
+                                    y=slope * x_ends + intercept,
                                     mode='lines',
                                     name="温度趋势",
                                     line=dict(color=self.color_theme["warning"], dash='dash', width=2),
                                     showlegend=False  # 不显示在图例中
                                 ),
-                                row=2, col=1
-                            )
+                                2, 1
+                            ))
                 except Exception as e:
                     st.warning(f"⚠️ 温度散点图生成失败: {e}")
               # 4. 功率vs辐射散点图
-            radiation_col = None
-            for col in combined_df.columns:
-                if any(rad in col for rad in ['辐射', 'TBQ', 'radiation']):
-                    radiation_col = col
-                    break
+            radiation_col = next((col for col in combined_df.columns if self._radiation_re.search(col)), None)
             
             if radiation_col:
                 try:
-                    # 过滤有效数据
-                    scatter_data = combined_df[[power_col, radiation_col]].dropna()
+                    # 过滤有效数据：两列一次转为数组，用np.isfinite得到单个掩码
+                    pair = combined_df[[power_col, radiation_col]].to_numpy(dtype=np.float64)
+                    valid_mask = np.isfinite(pair).all(axis=1)
                     
-                    if len(scatter_data) >= 3:
-                        fig.add_trace(
-                            go.Scatter(
-                                x=scatter_data[radiation_col],
-                                y=scatter_data[power_col],
+                    if valid_mask.sum() >= 3:
+                        placed.append((
+                            go.Scattergl(
+                                x=combined_df[radiation_col][valid_mask],
+                                y=combined_df[power_col][valid_mask],
                                 mode='markers',
                                 name="功率-辐射",
                                 marker=dict(
@@ -1474,25 +1759,27 @@ class InteractiveVisualizer:
                                 hovertemplate="<b>辐射</b>: %{x:.1f}W/m²<br><b>功率</b>: %{y:.2f}W<extra></extra>",
                                 showlegend=False  # 不显示在图例中
                             ),
-                            row=2, col=2
-                        )
+                            2, 2
+                        ))
                         
                         # 添加趋势线
-                        if len(scatter_data) >= 2:
-                            z = np.polyfit(scatter_data[radiation_col], scatter_data[power_col], 1)
-                            p = np.poly1d(z)
+                        if valid_mask.sum() >= 2:
+                            # 趋势线为直线，只需绘制数据范围两端的两个点
+                            x_fit = pair[valid_mask, 1]
+                            slope, intercept = np.polyfit(x_fit, pair[valid_mask, 0], 1)
+                            x_ends = np.array([x_fit.min(), x_fit.max()])
                             
-                            fig.add_trace(
-                                go.Scatter(
-                                    x=scatter_data[radiation_col],
-                                    y=p(scatter_data[radiation_col]),
+                            placed.append((
+                                go.Scattergl(
+                                    x=x_ends,
+                                    y=slope * x_ends + intercept,
                                     mode='lines',
                                     name="辐射趋势",
                                     line=dict(color=self.color_theme["success"], dash='dash', width=2),
                                     showlegend=False  # 不显示在图例中
                                 ),
-                                row=2, col=2
-                            )
+                                2, 2
+                            ))
                 except Exception as e:
                     st.warning(f"⚠️ 辐射散点图生成失败: {e}")
             
@@ -1502,7 +1789,7 @@ class InteractiveVisualizer:
                     # 计算功率与其他参数的相关系数
                     power_corr = corr_data[power_col].drop(power_col)  # 排除自相关
                     
-                    fig.add_trace(
+                    placed.append((
                         go.Bar(
                             x=power_corr.index,
                             y=power_corr.values,
@@ -1512,17 +1799,16 @@ class InteractiveVisualizer:
                             textposition='outside',
                             showlegend=False  # 不显示在图例中
                         ),
-                        row=3, col=1
-                    )
+                        3, 1
+                    ))
                 except Exception as e:
                     st.warning(f"⚠️ 相关系数柱状图生成失败: {e}")
             
             # 6. 多元回归分析结果
             try:
-                from sklearn.linear_model import LinearRegression
-                from sklearn.metrics import r2_score
-                
-                if len(env_cols) >= 1 and len(combined_df) >= 10:
+                if not SKLEARN_AVAILABLE:
+                    st.warning("⚠️ scikit-learn未安装，跳过多元回归分析")
+                elif len(env_cols) >= 1 and len(combined_df) >= 10:
                     # 选择最相关的几个环境因子
                     available_env_cols = [col for col in env_cols[:3] if col in combined_df.columns]
                     if available_env_cols:
@@ -1535,8 +1821,8 @@ class InteractiveVisualizer:
                             y_pred = lr_model.predict(X)
                             r2 = r2_score(y, y_pred)
                             
-                            fig.add_trace(
-                                go.Scatter(
+                            placed.append((
+                                go.Scattergl(
                                     x=y,
                                     y=y_pred,
                                     mode='markers',
@@ -1549,13 +1835,13 @@ class InteractiveVisualizer:
                                     hovertemplate="<b>实际值</b>: %{x:.2f}W<br><b>预测值</b>: %{y:.2f}W<extra></extra>",
                                     showlegend=False
                                 ),
-                                row=3, col=2
-                            )
+                                3, 2
+                            ))
                             
                             # 添加理想线
                             min_val, max_val = min(y.min(), y_pred.min()), max(y.max(), y_pred.max())
-                            fig.add_trace(
-                                go.Scatter(
+                            placed.append((
+                                go.Scattergl(
                                     x=[min_val, max_val],
                                     y=[min_val, max_val],
                                     mode='lines',
@@ -1563,13 +1849,16 @@ class InteractiveVisualizer:
                                     line=dict(color='red', dash='dash'),
                                     showlegend=False
                                 ),
-                                row=3, col=2
-                            )
+                                3, 2
+                            ))
             except Exception as e:
                 st.warning(f"⚠️ 多元回归分析失败: {e}")
             
+            self._add_placed_traces(fig, placed)
+            
             # 更新布局 - 优化图例显示
             fig.update_layout(
+                uirevision=location,
                 height=1000,  # 增加高度适应3行布局
                 title_text=f"🔍 MPPT与环境因子相关性分析仪表板 - {location}",
                 title_font_size=18,
@@ -1748,6 +2037,27 @@ class InteractiveVisualizer:
             else:
                 st.info("⏸️ 自动刷新: 已暂停")
     
+    def _search_rows(self, df: pd.DataFrame, search_term: str, max_rows: int, block_size: int = 20000) -> pd.DataFrame:
+        """
+        返回任一列文本包含关键词（不区分大小写，按字面匹配）的前max_rows行
+        
+        关键词只编译一次，逐列匹配后按位或合并，避免整表转为字符串副本再逐列apply；
+        按行分块扫描，匹配行数达到max_rows后不再扫描剩余数据
+        """
+        pattern = re.compile(re.escape(search_term), re.IGNORECASE)
+        matches = []
+        found = 0
+        for start in range(0, len(df), block_size):
+            block = df.iloc[start:start + block_size]
+            mask = np.zeros(len(block), dtype=bool)
+            for col in block.columns:
+                mask |= block[col].astype(str).str.contains(pattern, na=False).to_numpy()
+            matches.append(block[mask])
+            found += int(mask.sum())
+            if found >= max_rows:
+                break
+        return pd.concat(matches).head(max_rows) if matches else df.iloc[:0]
+    
     def run(self):
         """运行企业级交互式可视化平台"""
         # 企业级页面标题
@@ -1783,6 +2093,8 @@ class InteractiveVisualizer:
                     data["mppt"] = self.aggregate_data(data["mppt"], "eventTime", config["time_aggregation"])
                 if not data["weather"].empty:
                     data["weather"] = self.aggregate_data(data["weather"], "Date", config["time_aggregation"])
+                # 聚合后列名带统计后缀，重新确定各标签页共用的时间列和功率列
+                self._resolve_columns(data)
             
             progress_bar.progress(80)
             status_text.text("✅ 数据处理完成")
@@ -1817,12 +2129,13 @@ class InteractiveVisualizer:
             tabs.append("🔮 趋势预测")
         tabs.extend(["📋 数据表格", "📄 分析报告"])
         
-        # 创建标签页对象
-        tab_objects = st.tabs(tabs)
+        # 标签页选择器：st.tabs会在每次重跑时执行所有标签页的内容，
+        # 改为单选控件后只渲染当前选中的视图，其余视图（模型训练、相关性计算等）不再执行
+        active_tab = st.radio("分析视图", tabs, horizontal=True, label_visibility="collapsed")
         
         # MPPT数据标签页
         if config["show_mppt"] and "⚡ MPPT分析" in tabs:
-            with tab_objects[tabs.index("⚡ MPPT分析")]:
+            if active_tab == "⚡ MPPT分析":
                 st.markdown("### ⚡ MPPT性能分析仪表板")
                 
                 if not data["mppt"].empty:
@@ -1837,7 +2150,7 @@ class InteractiveVisualizer:
         
         # 气象数据标签页
         if config["show_weather"] and "🌤️ 气象分析" in tabs:
-            with tab_objects[tabs.index("🌤️ 气象分析")]:
+            if active_tab == "🌤️ 气象分析":
                 st.markdown("### 🌤️ 环境气象监控仪表板")
                 
                 if not data["weather"].empty:
@@ -1852,7 +2165,7 @@ class InteractiveVisualizer:
         
         # 相关性分析标签页
         if config["correlation_analysis"] and "🔍 相关性分析" in tabs:
-            with tab_objects[tabs.index("🔍 相关性分析")]:
+            if active_tab == "🔍 相关性分析":
                 st.markdown("### 🔍 MPPT与环境因子相关性分析")
                 
                 if not data["mppt"].empty and not data["weather"].empty:
@@ -1882,7 +2195,7 @@ class InteractiveVisualizer:
         
         # 位置对比分析标签页
         if config["comparison_mode"] and "📊 位置对比" in tabs:
-            with tab_objects[tabs.index("📊 位置对比")]:
+            if active_tab == "📊 位置对比":
                 st.markdown("### 📊 多位置对比分析")
                   # 加载对比位置数据
                 other_location = "专教" if config["location"] == "十五舍" else "十五舍"
@@ -1898,120 +2211,39 @@ class InteractiveVisualizer:
         
         # 趋势预测标签页
         if config["forecast_mode"] and "🔮 趋势预测" in tabs:
-            with tab_objects[tabs.index("🔮 趋势预测")]:
+            if active_tab == "🔮 趋势预测":
                 st.markdown("### 🔮 智能趋势预测分析")
                 
-                # 选择预测目标
-                predict_target = st.selectbox(
-                    "选择预测目标",
-                    ["MPPT功率", "气象参数"],
-                    help="选择要进行趋势预测的数据类型"
-                )
-                
-                if predict_target == "MPPT功率" and not data["mppt"].empty:
-                    st.markdown("#### ⚡ MPPT功率趋势预测")
-                    # 新增：气象特征多选交互
-                    weather_df = data["weather"] if not data["weather"].empty else None
-                    selected_weather_features = []
-                    if weather_df is not None:
-                        # 获取当前站点可用气象特征
-                        features_map = self.weather_features.get(config["location"], {})
-                        available_features = [v for k, v in features_map.items() if v in weather_df.columns]
-                        if available_features:
-                            selected_weather_features = st.multiselect(
-                                "选择用于发电预测的气象特征（可多选）",
-                                options=available_features,
-                                default=[f for f in available_features if "辐射" in f or "温度" in f],
-                                help="建议至少选择温度、辐射等关键特征"
-                            )
-                    # 创建趋势预测图表，传递气象数据和特征
-                    trend_chart = self.create_trend_prediction(
-                        data["mppt"], config["location"], config,
-                        weather_df=weather_df, selected_weather_features=selected_weather_features
-                    )
-                    if trend_chart:
-                        st.plotly_chart(trend_chart, use_container_width=True)
-                        with st.expander("📊 预测方法说明", expanded=False):
-                            st.markdown("""
-                            **预测模型**: 
-                            - 线性回归模型：基于时间趋势的简单预测
-                            - LSTM神经网络：专门处理时序数据的深度学习模型，能够捕捉长期依赖关系
-                            **LSTM模型特点**:
-                            - 时序建模：利用历史12个时间点预测未来趋势
-                            - 记忆机制：能够记住重要的历史信息
-                            - 非线性学习：捕捉复杂的时间模式
-                            - 数据标准化：使用MinMaxScaler进行数据归一化
-                            **传统模型特征工程**:
-                            - 时间戳特征：长期趋势
-                            - 小时特征：日内周期性
-                            - 星期特征：周内周期性  
-                            - 月份特征：季节性变化
-                            - 关键气象特征：如温度、辐射、湿度等
-                            **模型评估**:
-                            - MAE (平均绝对误差)：衡量预测精度，越小越好
-                            - R² (决定系数)：衡量模型解释能力，越接近1越好
-                            - 自动选择最优模型：基于MAE最小原则选择最佳预测模型
-                            **置信区间**: 95%置信区间基于残差标准误差计算
-                            **未来预测**: 仅显示7:00-17:00区间的未来趋势预测
-                            ⚠️ **注意**: 
-                            - LSTM模型需要至少50个数据点进行训练
-                            - 预测结果仅供参考，实际情况可能受到天气、设备状态等多种因素影响
-                            - 如果TensorFlow未安装，系统将自动回退到传统机器学习模型
-                            """)
-                    else:
-                        st.info("📈 数据不足，无法生成可靠的趋势预测")
-                
-                elif predict_target == "气象参数" and not data["weather"].empty:
-                    st.markdown("#### 🌤️ 气象参数趋势预测")
-                    
-                    # 选择要预测的气象参数
-                    weather_features = data["weather"].select_dtypes(include=[np.number]).columns.tolist()
-                    if weather_features:
-                        selected_feature = st.selectbox(
-                            "选择气象参数",
-                            weather_features,
-                            help="选择要预测的气象参数"
-                        )
-                        
-                        # 创建单列预测数据
-                        weather_subset = data["weather"][['Date', selected_feature]].copy() if 'Date' in data["weather"].columns else data["weather"][[data["weather"].columns[0], selected_feature]].copy()
-                        
-                        trend_chart = self.create_trend_prediction(
-                            weather_subset, config["location"], config
-                        )
-                        
-                        if trend_chart:
-                            st.plotly_chart(trend_chart, use_container_width=True)
-                        else:
-                            st.info("📈 数据不足，无法生成可靠的气象预测")
-                    else:
-                        st.warning("⚠️ 气象数据中没有可预测的数值参数")
-                
-                else:
-                    st.info("📊 请确保已加载相应的数据类型进行趋势预测")
+                self.render_trend_prediction(data, config)
         
         # 数据表格标签页
-        with tab_objects[tabs.index("📋 数据表格")]:
+        if active_tab == "📋 数据表格":
             st.markdown("### 📋 原始数据浏览器")
             
-            # 数据筛选器
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                show_columns = st.multiselect(
-                    "选择显示列",
-                    options=list(data["mppt"].columns) + list(data["weather"].columns),
-                    default=[]
-                )
-            with col2:
-                max_rows = st.number_input("最大显示行数", min_value=10, max_value=10000, value=1000)
-            with col3:
-                search_term = st.text_input("搜索关键词", "")
+            # 数据筛选器：放在表单中，修改筛选条件（如输入关键词）时不触发重跑，点击"应用筛选"后统一生效
+            with st.form("table_filters"):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    show_columns = st.multiselect(
+                        "选择显示列",
+                        options=list(data["mppt"].columns) + list(data["weather"].columns),
+                        default=[]
+                    )
+                with col2:
+                    max_rows = st.number_input("最大显示行数", min_value=10, max_value=10000, value=1000)
+                with col3:
+                    search_term = st.text_input("搜索关键词", "")
+                st.form_submit_button("应用筛选")
+            
+            # 决定表格内容的全部输入，作为CSV导出的缓存键
+            table_key = (config["location"], config["start_date"], config["end_date"], config["time_aggregation"],
+                         tuple(show_columns), int(max_rows), search_term)
             
             # MPPT数据表格
             if config["show_mppt"] and not data["mppt"].empty:
                 st.markdown("#### ⚡ MPPT数据表格")
                 
-                display_df = data["mppt"].copy()
+                display_df = data["mppt"]
                 
                 # 应用筛选
                 if show_columns:
@@ -2019,11 +2251,11 @@ class InteractiveVisualizer:
                     if available_cols:
                         display_df = display_df[available_cols]
                 
+                # 搜索时只扫描到凑满max_rows条匹配为止
                 if search_term:
-                    mask = display_df.astype(str).apply(lambda x: x.str.contains(search_term, case=False, na=False)).any(axis=1)
-                    display_df = display_df[mask]
-                
-                display_df = display_df.head(max_rows)
+                    display_df = self._search_rows(display_df, search_term, max_rows)
+                else:
+                    display_df = display_df.head(max_rows)
                 
                 st.dataframe(
                     display_df, 
@@ -2033,7 +2265,7 @@ class InteractiveVisualizer:
                 
                 # 下载按钮
                 if not display_df.empty:
-                    csv_data = display_df.to_csv(index=False).encode('utf-8-sig')
+                    csv_data = _to_csv_bytes(display_df, ("mppt",) + table_key)
                     st.download_button(
                         label="📥 下载MPPT数据CSV",
                         data=csv_data,
@@ -2046,7 +2278,7 @@ class InteractiveVisualizer:
             if config["show_weather"] and not data["weather"].empty:
                 st.markdown("#### 🌤️ 气象数据表格")
                 
-                display_df = data["weather"].copy()
+                display_df = data["weather"]
                 
                 # 应用筛选
                 if show_columns:
@@ -2054,11 +2286,11 @@ class InteractiveVisualizer:
                     if available_cols:
                         display_df = display_df[available_cols]
                 
+                # 搜索时只扫描到凑满max_rows条匹配为止
                 if search_term:
-                    mask = display_df.astype(str).apply(lambda x: x.str.contains(search_term, case=False, na=False)).any(axis=1)
-                    display_df = display_df[mask]
-                
-                display_df = display_df.head(max_rows)
+                    display_df = self._search_rows(display_df, search_term, max_rows)
+                else:
+                    display_df = display_df.head(max_rows)
                 
                 st.dataframe(
                     display_df, 
@@ -2068,7 +2300,7 @@ class InteractiveVisualizer:
                 
                 # 下载按钮
                 if not display_df.empty:
-                    csv_data = display_df.to_csv(index=False).encode('utf-8-sig')
+                    csv_data = _to_csv_bytes(display_df, ("weather",) + table_key)
                     st.download_button(
                         label="📥 下载气象数据CSV",
                         data=csv_data,
@@ -2078,7 +2310,7 @@ class InteractiveVisualizer:
                     )
         
         # 分析报告标签页
-        with tab_objects[tabs.index("📄 分析报告")]:
+        if active_tab == "📄 分析报告":
             st.markdown("### 📄 自动生成分析报告")
             
             # 生成综合分析报告            self.generate_analysis_report(data, config)
@@ -2105,23 +2337,16 @@ class InteractiveVisualizer:
             fig = go.Figure()
             
             # 改进的功率列识别逻辑
-            def find_power_columns(df):
-                """查找功率相关列"""
-                power_cols = []
-                
-                # 首先尝试精确匹配
-                power_keywords = ['power', '功率', 'watt', 'pv_power', 'mppt_power', 'solar_power']
-                for col in df.columns:
-                    if any(keyword in col.lower() for keyword in power_keywords):
-                        power_cols.append(col)
+            def find_power_columns(df, power_cols):
+                """查找功率相关列，优先使用加载时匹配到的功率列"""
+                power_cols = list(power_cols)
                 
                 # 如果没找到，尝试更宽泛的匹配
                 if not power_cols:
-                    broader_keywords = ['pv', 'mppt', 'solar', 'panel', '光伏']
                     for col in df.columns:
-                        if any(keyword in col.lower() for keyword in broader_keywords):
+                        if self._power_broad_re.search(col):
                             # 检查是否为数值列
-                            if pd.api.types.is_numeric_dtype(df[col]):
+                            if df[col].dtype.kind in 'iufb':
                                 power_cols.append(col)
                 
                 # 如果仍然没找到，使用所有数值列（排除时间列）
@@ -2132,20 +2357,20 @@ class InteractiveVisualizer:
                 
                 return power_cols
             
-            power_cols1 = find_power_columns(data1["mppt"])
-            power_cols2 = find_power_columns(data2["mppt"])
+            power_cols1 = find_power_columns(data1["mppt"], data1["columns"]["mppt_power"])
+            power_cols2 = find_power_columns(data2["mppt"], data2["columns"]["mppt_power"])
             
-            time_col1 = 'eventTime' if 'eventTime' in data1["mppt"].columns else data1["mppt"].columns[0]
-            time_col2 = 'eventTime' if 'eventTime' in data2["mppt"].columns else data2["mppt"].columns[0]
+            time_col1 = data1["columns"]["mppt_time"]
+            time_col2 = data2["columns"]["mppt_time"]
             
             # 确保时间列为datetime类型
             if time_col1 in data1["mppt"].columns:
-                data1["mppt"][time_col1] = pd.to_datetime(data1["mppt"][time_col1], errors='coerce')
+                data1["mppt"][time_col1] = _parse_datetime(data1["mppt"][time_col1])
             if time_col2 in data2["mppt"].columns:
-                data2["mppt"][time_col2] = pd.to_datetime(data2["mppt"][time_col2], errors='coerce')
+                data2["mppt"][time_col2] = _parse_datetime(data2["mppt"][time_col2])
             
-            # 添加数据轨迹
-            traces_added = 0
+            # 添加数据轨迹：两个位置的轨迹先收集，最后一次性添加到图表
+            traces = []
             
             if power_cols1:
                 for i, power_col in enumerate(power_cols1[:3]):  # 最多显示3个功率列
@@ -2153,14 +2378,14 @@ class InteractiveVisualizer:
                         # 过滤掉无效数据
                         valid_data = data1["mppt"][[time_col1, power_col]].dropna()
                         if not valid_data.empty:
-                            fig.add_trace(go.Scatter(
-                                x=valid_data[time_col1],
-                                y=valid_data[power_col],
+                            x_ds, y_ds = self._downsample(valid_data[time_col1], valid_data[power_col])
+                            traces.append(go.Scattergl(
+                                x=x_ds,
+                                y=y_ds,
                                 name=f"{location1} - {power_col}",
                                 line=dict(color=self.color_theme["primary"] if i == 0 else self.color_theme["success"], width=2),
                                 hovertemplate=f"<b>{location1}</b><br>时间: %{{x}}<br>{power_col}: %{{y:.2f}}<extra></extra>"
                             ))
-                            traces_added += 1
                     except Exception as e:
                         st.warning(f"添加 {location1} 数据时出错: {e}")
             
@@ -2170,18 +2395,19 @@ class InteractiveVisualizer:
                         # 过滤掉无效数据
                         valid_data = data2["mppt"][[time_col2, power_col]].dropna()
                         if not valid_data.empty:
-                            fig.add_trace(go.Scatter(
-                                x=valid_data[time_col2],
-                                y=valid_data[power_col],
+                            x_ds, y_ds = self._downsample(valid_data[time_col2], valid_data[power_col])
+                            traces.append(go.Scattergl(
+                                x=x_ds,
+                                y=y_ds,
                                 name=f"{location2} - {power_col}",
                                 line=dict(color=self.color_theme["secondary"] if i == 0 else self.color_theme["warning"], width=2),
                                 hovertemplate=f"<b>{location2}</b><br>时间: %{{x}}<br>{power_col}: %{{y:.2f}}<extra></extra>"
                             ))
-                            traces_added += 1
                     except Exception as e:
                         st.warning(f"添加 {location2} 数据时出错: {e}")
             
-            if traces_added > 0:
+            if traces:
+                fig.add_traces(traces)
                 fig.update_layout(
                     title=f"MPPT功率对比: {location1} vs {location2}",
                     xaxis_title="时间",
@@ -2231,13 +2457,14 @@ class InteractiveVisualizer:
             # 找到共同的气象参数
             features1 = self.weather_features.get(location1, {})
             features2 = self.weather_features.get(location2, {})
+            wcols1 = set(data1["weather"].columns)
+            wcols2 = set(data2["weather"].columns)
             
             # 找到共同参数（温度、湿度、气压）
-            common_params = []
-            for param in ['temperature', 'humidity', 'pressure']:
-                if (param in features1 and features1[param] in data1["weather"].columns and
-                    param in features2 and features2[param] in data2["weather"].columns):
-                    common_params.append(param)
+            common_params = [
+                param for param in ['temperature', 'humidity', 'pressure']
+                if features1.get(param) in wcols1 and features2.get(param) in wcols2
+            ]
             
             if common_params:
                 rows = len(common_params)
@@ -2247,32 +2474,40 @@ class InteractiveVisualizer:
                     vertical_spacing=0.1
                 )
                 
-                time_col1 = 'Date' if 'Date' in data1["weather"].columns else data1["weather"].columns[0]
-                time_col2 = 'Date' if 'Date' in data2["weather"].columns else data2["weather"].columns[0]
+                time_col1 = data1["columns"]["weather_time"]
+                time_col2 = data2["columns"]["weather_time"]
+                
+                # 两个位置的线条样式在所有子图中共用
+                line1 = dict(color=self.color_theme["primary"])
+                line2 = dict(color=self.color_theme["secondary"])
                 
+                placed = []  # (轨迹, 行, 列)，全部收集后一次性添加到子图
                 for i, param in enumerate(common_params):
                     col1 = features1[param]
                     col2 = features2[param]
                     
-                    fig.add_trace(
-                        go.Scatter(
-                            x=data1["weather"][time_col1],
-                            y=data1["weather"][col1],
+                    x_ds, y_ds = self._downsample(data1["weather"][time_col1], data1["weather"][col1])
+                    placed.append((
+                        go.Scattergl(
+                            x=x_ds,
+                            y=y_ds,
                             name=f"{location1} - {col1}",
-                            line=dict(color=self.color_theme["primary"])
+                            line=line1
                         ),
-                        row=i+1, col=1
-                    )
+                        i+1, 1
+                    ))
                     
-                    fig.add_trace(
-                        go.Scatter(
-                            x=data2["weather"][time_col2],
-                            y=data2["weather"][col2],
+                    x_ds, y_ds = self._downsample(data2["weather"][time_col2], data2["weather"][col2])
+                    placed.append((
+                        go.Scattergl(
+                            x=x_ds,
+                            y=y_ds,
                             name=f"{location2} - {col2}",
-                            line=dict(color=self.color_theme["secondary"])
+                            line=line2
                         ),
-                        row=i+1, col=1
-                    )
+                        i+1, 1
+                    ))
+                self._add_placed_traces(fig, placed)
                 
                 fig.update_layout(
                     height=300*rows,
@@ -2286,14 +2521,16 @@ class InteractiveVisualizer:
         """生成自动分析报告"""
         st.markdown("#### 📊 数据概览")
         
-        # 基本统计信息
+        # 基本统计信息（describe结果按数据缓存，并在下方结论中复用，避免重复扫描数据）
+        mppt_stats = None
+        weather_stats = None
         if not data["mppt"].empty:
-            mppt_stats = data["mppt"].describe()
+            mppt_stats = _describe(data["mppt"])
             st.markdown("**MPPT数据统计**")
             st.dataframe(mppt_stats, use_container_width=True)
         
         if not data["weather"].empty:
-            weather_stats = data["weather"].describe()
+            weather_stats = _describe(data["weather"])
             st.markdown("**气象数据统计**")
             st.dataframe(weather_stats, use_container_width=True)
         
@@ -2302,18 +2539,18 @@ class InteractiveVisualizer:
         
         conclusions = []
         
-        if not data["mppt"].empty:
-            power_cols = [col for col in data["mppt"].columns if 'power' in col.lower()]
+        if mppt_stats is not None:
+            power_cols = [col for col in data["columns"]["mppt_power"] if col in mppt_stats.columns]
             if power_cols:
-                avg_power = data["mppt"][power_cols[0]].mean()
-                max_power = data["mppt"][power_cols[0]].max()
+                avg_power = mppt_stats.loc['mean', power_cols[0]]
+                max_power = mppt_stats.loc['max', power_cols[0]]
                 conclusions.append(f"• MPPT平均功率: {avg_power:.2f}W，峰值功率: {max_power:.2f}W")
         
-        if not data["weather"].empty:
+        if weather_stats is not None:
             features = self.weather_features.get(config["location"], {})
-            if features.get('temperature') and features['temperature'] in data["weather"].columns:
-                temp_col = features['temperature']
-                avg_temp = data["weather"][temp_col].mean()
+            temp_col = features.get('temperature')
+            if temp_col in weather_stats.columns:
+                avg_temp = weather_stats.loc['mean', temp_col]
                 conclusions.append(f"• 平均环境温度: {avg_temp:.1f}°C")
         
         if "data_quality" in data:
@@ -2343,24 +2580,134 @@ class InteractiveVisualizer:
         if st.button("📄 生成完整PDF报告", help="生成包含所有图表和分析的完整报告"):
             st.info("📄 PDF报告生成功能正在开发中...")
     
-    def create_trend_prediction(self, df: pd.DataFrame, location: str, config: Dict[str, Any], weather_df=None, selected_weather_features=None) -> Optional[go.Figure]:
-        """创建企业级趋势预测分析，支持气象特征和7-17点x轴"""
+    @_fragment
+    def render_trend_prediction(self, data: Dict, config: Dict):
+        """渲染趋势预测标签页内容
+
+        以Streamlit片段(fragment)方式运行：预测目标、气象特征和气象参数这几个
+        选择控件变化时只重跑本片段，不会重新执行整个页面的数据加载和其他图表。
+        """
+        # 选择预测目标
+        predict_target = st.selectbox(
+            "选择预测目标",
+            ["MPPT功率", "气象参数"],
+            help="选择要进行趋势预测的数据类型"
+        )
+        
+        if predict_target == "MPPT功率" and not data["mppt"].empty:
+            st.markdown("#### ⚡ MPPT功率趋势预测")
+            # 新增：气象特征多选交互
+            weather_df = data["weather"] if not data["weather"].empty else None
+            selected_weather_features = []
+            if weather_df is not None:
+                # 获取当前站点可用气象特征
+                features_map = self.weather_features.get(config["location"], {})
+                available_features = [v for k, v in features_map.items() if v in weather_df.columns]
+                if available_features:
+                    selected_weather_features = st.multiselect(
+                        "选择用于发电预测的气象特征（可多选）",
+                        options=available_features,
+                        default=[f for f in available_features if "辐射" in f or "温度" in f],
+                        help="建议至少选择温度、辐射等关键特征"
+                    )
+            # 创建趋势预测图表，传递气象数据和特征
+            trend_chart = self.create_trend_prediction(
+                data["mppt"], config["location"], config,
+                weather_df=weather_df, selected_weather_features=selected_weather_features,
+                power_cols=data["columns"]["mppt_power"]
+            )
+            if trend_chart:
+                st.plotly_chart(trend_chart, use_container_width=True)
+                with st.expander("📊 预测方法说明", expanded=False):
+                    st.markdown("""
+                    **预测模型**: 
+                    - 线性回归模型：基于时间趋势的简单预测
+                    - LSTM神经网络：专门处理时序数据的深度学习模型，能够捕捉长期依赖关系
+                    **LSTM模型特点**:
+                    - 时序建模：利用历史12个时间点预测未来趋势
+                    - 记忆机制：能够记住重要的历史信息
+                    - 非线性学习：捕捉复杂的时间模式
+                    - 数据标准化：使用MinMaxScaler进行数据归一化
+                    **传统模型特征工程**:
+                    - 时间戳特征：长期趋势
+                    - 小时特征：日内周期性
+                    - 星期特征：周内周期性  
+                    - 月份特征：季节性变化
+                    - 关键气象特征：如温度、辐射、湿度等
+                    **模型评估**:
+                    - MAE (平均绝对误差)：衡量预测精度，越小越好
+                    - R² (决定系数)：衡量模型解释能力，越接近1越好
+                    - 自动选择最优模型：基于MAE最小原则选择最佳预测模型
+                    **置信区间**: 95%置信区间基于残差标准误差计算
+                    **未来预测**: 仅显示7:00-17:00区间的未来趋势预测
+                    ⚠️ **注意**: 
+                    - LSTM模型需要至少50个数据点进行训练
+                    - 预测结果仅供参考，实际情况可能受到天气、设备状态等多种因素影响
+                    - 如果TensorFlow未安装，系统将自动回退到传统机器学习模型
+                    """)
+            else:
+                st.info("📈 数据不足，无法生成可靠的趋势预测")
+        
+        elif predict_target == "气象参数" and not data["weather"].empty:
+            st.markdown("#### 🌤️ 气象参数趋势预测")
+            
+            # 选择要预测的气象参数
+            weather_features = data["weather"].select_dtypes(include=[np.number]).columns.tolist()
+            if weather_features:
+                selected_feature = st.selectbox(
+                    "选择气象参数",
+                    weather_features,
+                    help="选择要预测的气象参数"
+                )
+                
+                # 创建单列预测数据
+                weather_time_col = data["columns"]["weather_time"]
+                weather_subset = data["weather"][[weather_time_col, selected_feature]]
+                
+                trend_chart = self.create_trend_prediction(
+                    weather_subset, config["location"], config
+                )
+                
+                if trend_chart:
+                    st.plotly_chart(trend_chart, use_container_width=True)
+                else:
+                    st.info("📈 数据不足，无法生成可靠的气象预测")
+            else:
+                st.warning("⚠️ 气象数据中没有可预测的数值参数")
+        
+        else:
+            st.info("📊 请确保已加载相应的数据类型进行趋势预测")
+    
+    def _add_time_features(self, df: pd.DataFrame, time_col: str):
+        """
+        为预测数据添加时间戳与周期特征（时间戳秒、小时、星期、月份、年内第几天、是否周末）
+        
+        直接由datetime64数组按日期/小时单位截断计算，各特征共用同一份日期数组，
+        避免逐个.dt访问器重复遍历时间列；时间列不能含缺失值
+        """
+        times = df[time_col].to_numpy(dtype='datetime64[ns]')
+        days = times.astype('datetime64[D]')
+        day_of_week = (days.view('int64') + 3) % 7  # 1970-01-01为星期四，周一记为0
+        df['timestamp'] = times.astype('datetime64[s]').view('int64')
+        df['hour'] = (times.astype('datetime64[h]') - days).astype('int64')
+        df['day_of_week'] = day_of_week
+        df['month'] = days.astype('datetime64[M]').astype('int64') % 12 + 1
+        df['day_of_year'] = (days - days.astype('datetime64[Y]')).astype('int64') + 1
+        df['is_weekend'] = (day_of_week >= 5).astype(int)
+    
+    def create_trend_prediction(self, df: pd.DataFrame, location: str, config: Dict[str, Any], weather_df=None, selected_weather_features=None, power_cols=None) -> Optional[go.Figure]:
+        """创建企业级趋势预测分析，支持气象特征和7-17点x轴；power_cols为加载时已匹配的功率列，未提供时按列名匹配"""
         if df.empty:
             st.info("📈 暂无数据进行趋势预测")
             return None
             
+        if not SKLEARN_AVAILABLE:
+            st.error("❌ 趋势预测需要scikit-learn，请先安装: pip install scikit-learn")
+            return None
+            
         try:
-            from sklearn.linear_model import LinearRegression
-            from sklearn.metrics import mean_absolute_error, r2_score, mean_squared_error
-            from sklearn.preprocessing import StandardScaler
-            import warnings
-            warnings.filterwarnings('ignore')
-            try:
-                import xgboost as xgb
-                xgboost_available = True
-            except ImportError:
+            if not XGBOOST_AVAILABLE:
                 st.warning("⚠️ XGBoost未安装，将只使用线性回归模型")
-                xgboost_available = False
             # 时间列和目标列
             time_col = None
             for col in df.columns:
@@ -2369,11 +2716,8 @@ class InteractiveVisualizer:
                     break
             if not time_col:
                 time_col = df.columns[0]
-            power_cols = []
-            power_keywords = ['power', '功率', 'watt', 'pv_power', 'mppt_power', 'solar_power']
-            for col in df.columns:
-                if any(keyword in col.lower() for keyword in power_keywords):
-                    power_cols.append(col)
+            if power_cols is None:
+                power_cols = [col for col in df.columns if self._power_re.search(col)]
             if not power_cols:
                 numeric_cols = df.select_dtypes(include=[np.number]).columns
                 potential_cols = [col for col in numeric_cols if 'time' not in col.lower()]
@@ -2384,13 +2728,14 @@ class InteractiveVisualizer:
                 st.warning("⚠️ 无法找到合适的预测目标列")
                 return None
             target_col = power_cols[0]
-            df[time_col] = pd.to_datetime(df[time_col], errors='coerce')
-            df_pred = df[[time_col, target_col]].dropna().sort_values(time_col).reset_index(drop=True)
+            # 只取用到的两列构建预测数据，不修改传入的数据
+            df_pred = pd.DataFrame({time_col: _parse_datetime(df[time_col]), target_col: df[target_col]})
+            df_pred = df_pred.dropna().sort_values(time_col).reset_index(drop=True)
             # 新增：合并气象特征
             if weather_df is not None and selected_weather_features:
                 weather_df = weather_df.copy()
                 weather_time_col = 'Date' if 'Date' in weather_df.columns else weather_df.columns[0]
-                weather_df[weather_time_col] = pd.to_datetime(weather_df[weather_time_col], errors='coerce')
+                weather_df[weather_time_col] = _parse_datetime(weather_df[weather_time_col])
                 # 只保留需要的气象特征
                 weather_merge = weather_df[[weather_time_col] + selected_weather_features].dropna()
                 # 以小时为单位merge（可根据实际数据粒度调整）
@@ -2402,20 +2747,19 @@ class InteractiveVisualizer:
                 st.warning(f"⚠️ 数据量不足 ({len(df_pred)} 条)，需要至少20个数据点")
                 return None
             # 时间/周期特征
-            df_pred['timestamp'] = df_pred[time_col].astype(np.int64) // 10**9
-            df_pred['hour'] = df_pred[time_col].dt.hour
-            df_pred['day_of_week'] = df_pred[time_col].dt.dayofweek
-            df_pred['month'] = df_pred[time_col].dt.month
-            df_pred['day_of_year'] = df_pred[time_col].dt.dayofyear
-            df_pred['is_weekend'] = (df_pred[time_col].dt.dayofweek >= 5).astype(int)
+            self._add_time_features(df_pred, time_col)
             # 滞后/滚动特征
             for lag in [1, 2, 3, 6, 12, 24]:
                 if len(df_pred) > lag:
                     df_pred[f'{target_col}_lag_{lag}'] = df_pred[target_col].shift(lag)
+            # 滚动特征：基于numpy滑动窗口视图一次性计算，前window-1个位置补NaN（与rolling一致）
+            target_values = df_pred[target_col].to_numpy(dtype=np.float64)
             for window in [6, 12, 24]:
                 if len(df_pred) > window:
-                    df_pred[f'{target_col}_rolling_mean_{window}'] = df_pred[target_col].rolling(window).mean()
-                    df_pred[f'{target_col}_rolling_std_{window}'] = df_pred[target_col].rolling(window).std()
+                    windows = sliding_window_view(target_values, window)
+                    pad = np.full(window - 1, np.nan)
+                    df_pred[f'{target_col}_rolling_mean_{window}'] = np.concatenate([pad, windows.mean(axis=-1)])
+                    df_pred[f'{target_col}_rolling_std_{window}'] = np.concatenate([pad, windows.std(axis=-1, ddof=1)])
             df_pred = df_pred.dropna()
             if len(df_pred) < 20:
                 st.warning("⚠️ 添加特征后数据量不足，无法进行预测")
@@ -2429,45 +2773,18 @@ class InteractiveVisualizer:
                 and not np.issubdtype(df_pred[col].dtype, np.datetime64)
             ]
             
-            # 训练模型 - 只保留线性回归和XGBoost
-            models = {
-                '线性回归': LinearRegression()
-            }
-            if xgboost_available:
-                models['XGBoost'] = xgb.XGBRegressor(n_estimators=50, max_depth=4, learning_rate=0.1, 
-                                                   subsample=0.8, colsample_bytree=0.8, 
-                                                   random_state=42, verbosity=0)
-            
-            # 标准化特征
-            scaler = StandardScaler()
-            X_train = scaler.fit_transform(train_data[feature_cols])
-            X_test = scaler.transform(test_data[feature_cols]) if len(test_data) > 0 else X_train
-            y_train = train_data[target_col].values
-            y_test = test_data[target_col].values if len(test_data) > 0 else y_train
-            
-            model_results = {}
-            trained_models = {}
-            
-            for name, model in models.items():
-                try:
-                    model.fit(X_train, y_train)
-                    y_pred = model.predict(X_test)
-                    
-                    mae = mean_absolute_error(y_test, y_pred)
-                    mse = mean_squared_error(y_test, y_pred)
-                    r2 = r2_score(y_test, y_pred)
-                    
-                    model_results[name] = {
-                        'model': model, 
-                        'predictions': y_pred, 
-                        'mae': mae, 
-                        'mse': mse,
-                        'r2': r2
-                    }
-                    trained_models[name] = model
-                except Exception as e:
-                    st.warning(f"模型 {name} 训练失败: {e}")
-                    continue
+            # 标准化特征（标准化后转为float32以减少模型训练/预测的内存带宽，
+            # 标准化前保持float64以免时间戳特征损失精度）
+            scaler = StandardScaler(copy=False)
+            X_train = scaler.fit_transform(train_data[feature_cols].to_numpy(dtype=np.float64)).astype(np.float32)
+            X_test = scaler.transform(test_data[feature_cols].to_numpy(dtype=np.float64)).astype(np.float32) if len(test_data) > 0 else X_train
+            y_train = train_data[target_col].to_numpy(dtype=np.float32)
+            y_test = test_data[target_col].to_numpy(dtype=np.float32) if len(test_data) > 0 else y_train
+            
+            model_results, failures = _fit_trend_models(X_train, y_train, X_test, y_test)
+            for name, error in failures.items():
+                st.warning(f"模型 {name} 训练失败: {error}")
+            trained_models = {name: info['model'] for name, info in model_results.items()}
             
             if not model_results:
                 st.error("❌ 所有预测模型训练失败")
@@ -2476,7 +2793,6 @@ class InteractiveVisualizer:
             best_model_name = max(model_results.keys(), key=lambda x: model_results[x]['r2'])
             best_model = trained_models[best_model_name]
             best_model_result = model_results[best_model_name]            # 创建可视化图表 - 修改为2行1列布局，移除预测误差分布
-            from plotly.subplots import make_subplots
             fig = make_subplots(
                 rows=2, cols=2,
                 subplot_titles=[
@@ -2489,20 +2805,27 @@ class InteractiveVisualizer:
                 vertical_spacing=0.15,
                 horizontal_spacing=0.12,
                 row_heights=[0.4, 0.6]  # 给未来预测更多空间
-            )            # 3. 未来能耗预测（13:00-17:00）- 使用所有模型预测并与实际值对比
+            )
+            # 各子图的轨迹先收集，最后通过一次add_traces批量添加
+            history_traces = []   # row=1, col=1
+            metric_traces = []    # row=1, col=2
+            future_traces = []    # row=2, col=1
+            # 3. 未来能耗预测（13:00-17:00）- 使用所有模型预测并与实际值对比
             try:
-                # 获取数据中的最后一天
-                last_day = df_pred[time_col].dt.date.max()
-                
-                # 获取最后一天的所有数据
-                last_day_data = df_pred[df_pred[time_col].dt.date == last_day].copy()
-                
-                if len(last_day_data) == 0:
+                # 获取数据中的最后一天（基于datetime64数组一次性计算日期和小时掩码）
+                ts_h = df_pred[time_col].to_numpy(dtype='datetime64[h]')
+                ts_d = ts_h.astype('datetime64[D]')
+                last_day_np = ts_d.max()
+                last_day = last_day_np.astype(object)
+                day_mask = ts_d == last_day_np
+                
+                if not day_mask.any():
                     raise ValueError("无法找到最后一天的数据")
                 
                 # 分离最后一天的前半天（作为预测基础）和后半天（作为预测目标和对比）
-                last_day_morning = last_day_data[last_day_data[time_col].dt.hour < 13]  # 13:00之前
-                last_day_afternoon = last_day_data[last_day_data[time_col].dt.hour >= 13]  # 13:00-17:00
+                hour = (ts_h - ts_d).astype(np.int64)
+                last_day_morning = df_pred[day_mask & (hour < 13)]  # 13:00之前
+                last_day_afternoon = df_pred[day_mask & (hour >= 13)]  # 13:00-17:00
                 
                 if len(last_day_afternoon) == 0:
                     raise ValueError("最后一天没有13:00-17:00的数据")
@@ -2519,19 +2842,14 @@ class InteractiveVisualizer:
                 prediction_df = pd.DataFrame({time_col: prediction_times})
                 
                 # 为预测时间生成特征
-                prediction_df['timestamp'] = prediction_df[time_col].astype(np.int64) // 10**9
-                prediction_df['hour'] = prediction_df[time_col].dt.hour
-                prediction_df['day_of_week'] = prediction_df[time_col].dt.dayofweek
-                prediction_df['month'] = prediction_df[time_col].dt.month
-                prediction_df['day_of_year'] = prediction_df[time_col].dt.dayofyear
-                prediction_df['is_weekend'] = (prediction_df[time_col].dt.dayofweek >= 5).astype(int)
+                self._add_time_features(prediction_df, time_col)
                 
                 # 使用最后一天前半天的数据作为特征基础
                 if len(last_day_morning) > 0:
-                    recent_values = last_day_morning[target_col].values
+                    recent_values = last_day_morning[target_col].to_numpy()
                 else:
                     # 如果没有前半天数据，使用前一天的数据
-                    recent_values = train_data[target_col].tail(24).values
+                    recent_values = train_data[target_col].to_numpy()[-24:]
                 
                 if len(recent_values) == 0:
                     recent_values = np.array([train_data[target_col].mean()])
@@ -2555,7 +2873,7 @@ class InteractiveVisualizer:
                 # 添加气象特征（如果有的话）
                 if weather_df is not None and selected_weather_features:
                     # 获取最后一天的气象数据
-                    weather_last_day = weather_df[weather_df[weather_time_col].dt.date == last_day]
+                    weather_last_day = weather_df[weather_df[weather_time_col].to_numpy(dtype='datetime64[D]') == last_day_np]
                     
                     for feature in selected_weather_features:
                         if feature in weather_df.columns:
@@ -2574,15 +2892,17 @@ class InteractiveVisualizer:
                     if col not in prediction_df.columns:
                         prediction_df[col] = 0
                   # 使用所有模型进行预测
-                X_future = scaler.transform(prediction_df[feature_cols])
+                X_future = scaler.transform(prediction_df[feature_cols].to_numpy(dtype=np.float64)).astype(np.float32)
+                # 每个模型只预测一次，绘图与精度计算复用
+                future_preds = {name: info['model'].predict(X_future) for name, info in model_results.items()}
                 
                 # 添加置信区间（基于最佳模型的训练误差）
                 best_model = trained_models[best_model_name]
-                best_predictions = best_model.predict(X_future)
+                best_predictions = future_preds[best_model_name]
                 
                 # 计算置信区间（基于训练误差的标准差）
                 train_predictions = best_model.predict(X_train)
-                residuals = y_train - train_predictions
+                residuals = y_train.astype(np.float64) - train_predictions
                 residual_std = np.std(residuals)
                 
                 # 三种置信度：68%, 95%, 99%
@@ -2590,6 +2910,9 @@ class InteractiveVisualizer:
                 z_scores = [1.0, 1.96, 2.58]
                 colors_confidence = ["rgba(255, 165, 0, 0.1)", "rgba(255, 165, 0, 0.2)", "rgba(255, 165, 0, 0.3)"]
                 
+                # 置信带的闭合x坐标（正向+反向）对所有置信度相同，只构建一次
+                band_x = prediction_times + prediction_times[::-1]
+                
                 # 绘制置信区间（从最宽到最窄）
                 for i, (conf_level, z_score, color) in enumerate(zip(confidence_levels[::-1], z_scores[::-1], colors_confidence[::-1])):
                     upper_bound = best_predictions + z_score * residual_std
@@ -2598,20 +2921,20 @@ class InteractiveVisualizer:
                     # 确保下界不为负
                     lower_bound = np.maximum(lower_bound, 0)
                     
-                    fig.add_trace(go.Scatter(
-                        x=prediction_times + prediction_times[::-1],
-                        y=list(upper_bound) + list(lower_bound[::-1]),
+                    future_traces.append(go.Scattergl(
+                        x=band_x,
+                        y=np.concatenate([upper_bound, lower_bound[::-1]]),
                         fill='toself',
                         fillcolor=color,
                         line=dict(color='rgba(255,255,255,0)'),
                         name=f"{int(confidence_levels[len(confidence_levels)-1-i]*100)}% 置信区间",
                         showlegend=True,
                         hoverinfo='skip'
-                    ), row=2, col=1)
+                    ))
                 
                 # 绘制实际值（如果存在）
                 if len(last_day_afternoon) > 0:
-                    fig.add_trace(go.Scatter(
+                    future_traces.append(go.Scattergl(
                         x=last_day_afternoon[time_col], 
                         y=last_day_afternoon[target_col],
                         name="实际值",
@@ -2619,16 +2942,15 @@ class InteractiveVisualizer:
                         mode='lines+markers',
                         marker=dict(size=8),
                         hovertemplate="<b>实际值</b><br>时间: %{x}<br>功率: %{y:.2f}W<extra></extra>"
-                    ), row=2, col=1)
+                    ))
                 
                 # 为每个模型生成预测并绘制
                 colors_models = [self.color_theme["warning"], self.color_theme["info"], self.color_theme["secondary"]]
                 for i, (model_name, model_info) in enumerate(model_results.items()):
-                    model = model_info['model']
-                    predictions = model.predict(X_future)
+                    predictions = future_preds[model_name]
                     
                     # 绘制预测曲线
-                    fig.add_trace(go.Scatter(
+                    future_traces.append(go.Scattergl(
                         x=prediction_times, 
                         y=predictions,
                         name=f"{model_name}预测",
@@ -2636,28 +2958,21 @@ class InteractiveVisualizer:
                         mode='lines+markers',
                         marker=dict(size=6),
                         hovertemplate=f"<b>{model_name}预测</b><br>时间: %{{x}}<br>功率: %{{y:.2f}}W<br>MAE: {model_info['mae']:.2f}<extra></extra>"
-                    ), row=2, col=1)
+                    ))
                 
                 # 计算并显示预测精度（如果有实际值）
                 if len(last_day_afternoon) > 0:
-                    # 将预测时间与实际数据时间对齐
+                    # 将预测时间与实际数据时间对齐：每个预测时间取最接近的实际数据点（30分钟内），
+                    # 对齐结果与模型无关，基于数组一次性计算后供各模型复用
+                    actual_times = last_day_afternoon[time_col].to_numpy()
+                    time_diffs = np.abs(actual_times[np.newaxis, :] - np.array(prediction_times, dtype='datetime64[ns]')[:, np.newaxis])
+                    closest = time_diffs.argmin(axis=1)
+                    matched = time_diffs[np.arange(len(closest)), closest] <= np.timedelta64(30, 'm')
+                    aligned_actual = last_day_afternoon[target_col].to_numpy()[closest[matched]]
+                    
                     prediction_accuracy = {}
-                    for model_name, model_info in model_results.items():
-                        model = model_info['model']
-                        predictions = model.predict(X_future)
-                        
-                        # 简单的时间对齐：找到最接近的实际数据点
-                        aligned_actual = []
-                        aligned_pred = []
-                        
-                        for i, pred_time in enumerate(prediction_times):
-                            # 找到最接近的实际数据点
-                            time_diffs = abs(last_day_afternoon[time_col] - pred_time)
-                            closest_idx = time_diffs.idxmin()
-                            
-                            if time_diffs.loc[closest_idx] <= pd.Timedelta(minutes=30):  # 30分钟内的匹配
-                                aligned_actual.append(last_day_afternoon.loc[closest_idx, target_col])
-                                aligned_pred.append(predictions[i])
+                    for model_name in model_results:
+                        aligned_pred = future_preds[model_name][matched]
                         
                         if len(aligned_actual) > 0:
                             afternoon_mae = mean_absolute_error(aligned_actual, aligned_pred)
@@ -2694,7 +3009,6 @@ class InteractiveVisualizer:
                 
             except Exception as e:
                 st.error(f"后半天预测生成失败: {e}")
-                import traceback
                 st.text(traceback.format_exc())
                 fig.add_annotation(
                     text=f"预测生成失败: {str(e)}",
@@ -2705,60 +3019,68 @@ class InteractiveVisualizer:
                 )
             
             # 1. 历史趋势与预测对比
-            fig.add_trace(go.Scatter(
-                x=train_data[time_col], 
-                y=train_data[target_col],
+            x_ds, y_ds = self._downsample(train_data[time_col], train_data[target_col])
+            history_traces.append(go.Scattergl(
+                x=x_ds, 
+                y=y_ds,
                 name="训练数据",
                 line=dict(color=self.color_theme["primary"], width=2),
                 hovertemplate="<b>训练数据</b><br>时间: %{x}<br>数值: %{y:.2f}<extra></extra>"
-            ), row=1, col=1)
+            ))
             
             if len(test_data) > 0:
-                fig.add_trace(go.Scatter(
+                history_traces.append(go.Scattergl(
                     x=test_data[time_col], 
                     y=test_data[target_col],
                     name="实际数据",
                     line=dict(color=self.color_theme["success"], width=2),
                     hovertemplate="<b>实际数据</b><br>时间: %{x}<br>数值: %{y:.2f}<extra></extra>"
-                ), row=1, col=1)
-                fig.add_trace(go.Scatter(
+                ))
+                history_traces.append(go.Scattergl(
                     x=test_data[time_col], 
                     y=best_model_result['predictions'],
                     name=f"预测数据 ({best_model_name})",
                     line=dict(color=self.color_theme["warning"], width=2, dash='dash'),
                     hovertemplate=f"<b>预测数据</b><br>时间: %{{x}}<br>数值: %{{y:.2f}}<br>MAE: {best_model_result['mae']:.2f}<extra></extra>"
-                ), row=1, col=1)            # 2. 模型预测精度对比（MAE, MSE, R²）
+                ))            # 2. 模型预测精度对比（MAE, MSE, R²）
             model_names = list(model_results.keys())
             mae_values = [model_results[name]['mae'] for name in model_names]
             mse_values = [model_results[name]['mse'] for name in model_names]
             r2_values = [model_results[name]['r2'] for name in model_names]
             
             # 创建分组柱状图
-            fig.add_trace(go.Bar(
+            metric_traces.append(go.Bar(
                 x=[f"{name}<br>MAE" for name in model_names],
                 y=mae_values,
                 name="MAE",
                 marker_color=self.color_theme["secondary"],
                 text=[f"{mae:.2f}" for mae in mae_values],
                 textposition='auto'
-            ), row=1, col=2)
+            ))
             
-            fig.add_trace(go.Bar(
+            metric_traces.append(go.Bar(
                 x=[f"{name}<br>MSE" for name in model_names],
                 y=mse_values,
                 name="MSE",
                 marker_color=self.color_theme["info"],
                 text=[f"{mse:.2f}" for mse in mse_values],
                 textposition='auto'
-            ), row=1, col=2)
+            ))
             
-            fig.add_trace(go.Bar(
+            metric_traces.append(go.Bar(
                 x=[f"{name}<br>R²" for name in model_names],
                 y=r2_values,
                 name="R²",
                 marker_color=self.color_theme["success"],
                 text=[f"{r2:.3f}" for r2 in r2_values],
-                textposition='auto'            ), row=1, col=2)            
+                textposition='auto'            ))            
+            
+            # 批量添加所有轨迹（顺序与图例顺序一致）
+            fig.add_traces(
+                future_traces + history_traces + metric_traces,
+                rows=[2] * len(future_traces) + [1] * len(history_traces) + [1] * len(metric_traces),
+                cols=[1] * len(future_traces) + [1] * len(history_traces) + [2] * len(metric_traces)
+            )
             
             fig.update_layout(
                 height=800,
@@ -2789,7 +3111,6 @@ class InteractiveVisualizer:
             return fig
         except Exception as e:
             st.error(f"趋势预测分析失败: {e}")
-            import traceback
             st.text(traceback.format_exc())
             return None
 
@@ -4,109 +4,160 @@ MPPT数据采集与可视化系统启动脚本
 """
 
 import argparse
+import codecs
+import functools
+import json
 import subprocess
 import sys
 import os
+from collections import deque
 from pathlib import Path
 
+# 系统依赖包列表，安装和生成requirements-launcher.txt共用；版本上限与requirements.txt保持一致
+# （代码依赖pandas 1.x的行为，如resample('H')和不带format='ISO8601'的时间解析）
+REQUIRED_PACKAGES = [
+    "pandas>=1.5.0,<2.0.0",
+    "numpy>=1.21.0,<2.0.0",
+    "plotly>=5.0.0,<6.0.0",
+    "streamlit>=1.28.0,<2.0.0",
+    "scikit-learn>=1.0.0,<2.0.0",
+    "xgboost>=1.7.0,<2.0.0",
+    "openpyxl>=3.0.0",
+    "matplotlib>=3.5.0",
+    "seaborn>=0.11.0",
+    "requests>=2.28.0",
+    "urllib3>=1.26.0",
+    "pytz>=2022.1",
+    "pyyaml>=6.0",
+    "scipy>=1.9.0,<2.0.0",
+    "jupyter>=1.0.0",
+    "notebook>=6.4.0",
+    "ipykernel>=6.15.0",
+    "colorlog>=6.6.0",
+    "psutil>=5.9.0"
+]
+
+# 启动器安装记录文件；requirements.txt是手工维护的部署依赖（Streamlit Cloud据此安装），启动器不改写它
+LAUNCHER_REQUIREMENTS_FILE = Path("requirements-launcher.txt")
+
+# 安装记录文件的完整内容，模块加载时编码一次，以二进制写出（换行符固定为\n）
+REQUIREMENTS_BYTES = (
+    "# MPPT数据采集与可视化系统依赖包\n# 此文件由launcher.py install自动生成，记录启动器安装的包\n\n"
+    + "\n".join(REQUIRED_PACKAGES) + "\n"
+).encode("utf-8")
+
+# pip公共参数：优先使用已编译的wheel（命中pip缓存时无需重新下载或构建），并跳过pip自身的版本检查请求
+PIP_INSTALL_OPTIONS = ["--upgrade", "--prefer-binary", "--disable-pip-version-check"]
+
+# 安装失败时保留的pip输出末尾行数
+PIP_ERROR_TAIL_LINES = 40
+
+def _pip_install(*requirements, stream=False):
+    """
+    调用pip安装，返回 (是否成功, 错误信息)
+    
+    stream为True时pip的输出直接显示在终端上（可看到下载/安装进度），不再捕获错误信息；
+    否则合并stdout/stderr逐行读取，只保留最后PIP_ERROR_TAIL_LINES行作为错误信息，
+    构建源码包时的大量输出不会整体缓存在内存中
+    """
+    cmd = [sys.executable, "-m", "pip", "install", *requirements, *PIP_INSTALL_OPTIONS]
+    try:
+        if stream:
+            return subprocess.run(cmd).returncode == 0, ""
+        with subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding='utf-8',
+            errors='ignore',
+            bufsize=1
+        ) as proc:
+            tail = deque(proc.stdout, maxlen=PIP_ERROR_TAIL_LINES)
+            returncode = proc.wait()
+    except Exception as e:
+        return False, f"安装异常: {e}"
+    if returncode == 0:
+        return True, ""
+    return False, "".join(tail).strip()
+
+def _is_installed(requirement):
+    """检查依赖是否已安装且版本满足要求；无法判断（如缺少packaging库）时视为未满足"""
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+        from packaging.requirements import Requirement
+    except ImportError:
+        return False
+    req = Requirement(requirement)
+    try:
+        return req.specifier.contains(version(req.name), prereleases=True)
+    except PackageNotFoundError:
+        return False
+
 def install_requirements():
-    """安装依赖包"""
+    """
+    安装依赖包
+    
+    已安装且版本满足要求的包在本地检查后直接跳过，其余的包用一个pip进程批量安装
+    （只需一次解释器启动和依赖解析）；批量安装失败时再逐个安装以定位失败的包
+    """
     print("正在安装依赖包...")
     
-    # 定义需要安装的包列表
-    packages = [
-        "pandas>=1.5.0",
-        "numpy>=1.21.0", 
-        "plotly>=5.0.0",
-        "streamlit>=1.28.0",
-        "matplotlib>=3.5.0",
-        "seaborn>=0.11.0",
-        "requests>=2.28.0",
-        "urllib3>=1.26.0",
-        "pytz>=2022.1",
-        "pyyaml>=6.0",
-        "scipy>=1.9.0",
-        "jupyter>=1.0.0",
-        "notebook>=6.4.0",
-        "ipykernel>=6.15.0",
-        "colorlog>=6.6.0",
-        "psutil>=5.9.0"
-    ]
+    # 先写出安装记录文件，安装中断后也可直接用 pip install -r requirements-launcher.txt 重试
+    create_requirements_file()
     
+    packages = [package for package in REQUIRED_PACKAGES if not _is_installed(package)]
+    if not packages:
+        print(f"✅ 所有依赖包已安装且版本满足要求 ({len(REQUIRED_PACKAGES)} 个)")
+        return True
+    print(f"需要安装 {len(packages)}/{len(REQUIRED_PACKAGES)} 个包")
+    
+    ok, _ = _pip_install(*packages, stream=True)
+    if ok:
+        print(f"✅ 所有依赖包安装成功! ({len(packages)} 个)")
+        return True
+    
+    print("⚠️ 批量安装失败，逐个安装以定位失败的包...")
     success_count = 0
     failed_packages = []
     
+    # 逐个顺序安装：pip不对site-packages加锁，多个pip进程同时升级共享依赖（如numpy）会相互破坏环境
     for package in packages:
         print(f"正在安装: {package}")
-        try:
-            result = subprocess.run(
-                [sys.executable, "-m", "pip", "install", package, "--upgrade"],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='ignore'
-            )
-            
-            if result.returncode == 0:
-                print(f"  ✅ {package} 安装成功")
-                success_count += 1
-            else:
-                print(f"  ❌ {package} 安装失败")
-                failed_packages.append(package)
-                if result.stderr:
-                    print(f"     错误: {result.stderr.strip()}")
-                    
-        except Exception as e:
-            print(f"  ❌ {package} 安装异常: {e}")
+        ok, error = _pip_install(package)
+        if ok:
+            print(f"  ✅ {package} 安装成功")
+            success_count += 1
+        else:
+            print(f"  ❌ {package} 安装失败")
             failed_packages.append(package)
+            if error:
+                print(f"     错误: {error}")
     
-    print(f"\n📊 安装结果:")
-    print(f"  成功: {success_count}/{len(packages)}")
+    # 汇总报告拼接后一次性输出
+    report = ["\n📊 安装结果:", f"  成功: {success_count}/{len(packages)}"]
     if failed_packages:
-        print(f"  失败: {len(failed_packages)} 个包")
-        print("  失败的包:")
-        for pkg in failed_packages:
-            print(f"    - {pkg}")
-        print("\n💡 建议:")
-        print("1. 检查网络连接")
-        print("2. 更新pip: python -m pip install --upgrade pip")
-        print("3. 手动安装失败的包")
+        report.append(f"  失败: {len(failed_packages)} 个包")
+        report.append("  失败的包:")
+        report.extend(f"    - {pkg}" for pkg in failed_packages)
+        report.append("\n💡 建议:")
+        report.append("1. 检查网络连接")
+        report.append("2. 更新pip: python -m pip install --upgrade pip")
+        report.append("3. 手动安装失败的包")
+        print("\n".join(report))
         return False
     else:
-        print("✅ 所有依赖包安装成功!")
-        # 创建requirements.txt文件作为记录
-        create_requirements_file()
+        report.append("✅ 所有依赖包安装成功!")
+        print("\n".join(report))
         return True
 
 def create_requirements_file():
-    """创建requirements.txt文件"""
-    requirements_content = """# MPPT数据采集与可视化系统依赖包
-# 此文件由系统自动生成，记录已安装的包
-
-pandas>=1.5.0
-numpy>=1.21.0
-plotly>=5.0.0
-streamlit>=1.28.0
-matplotlib>=3.5.0
-seaborn>=0.11.0
-requests>=2.28.0
-urllib3>=1.26.0
-pytz>=2022.1
-pyyaml>=6.0
-scipy>=1.9.0
-jupyter>=1.0.0
-notebook>=6.4.0
-ipykernel>=6.15.0
-colorlog>=6.6.0
-psutil>=5.9.0
-"""
-    
+    """创建启动器的安装记录文件（不改写部署用的requirements.txt）"""
     try:
-        with open("requirements.txt", "w", encoding="utf-8", newline='\n') as f:
-            f.write(requirements_content)
-        print("📝 requirements.txt文件已更新")
+        LAUNCHER_REQUIREMENTS_FILE.write_bytes(REQUIREMENTS_BYTES)
+        print(f"📝 {LAUNCHER_REQUIREMENTS_FILE}文件已更新")
     except Exception as e:
-        print(f"⚠️ 创建requirements.txt文件失败: {e}")
+        print(f"⚠️ 创建{LAUNCHER_REQUIREMENTS_FILE}文件失败: {e}")
 
 def run_data_collector(args):
     """运行数据采集器"""
@@ -150,6 +201,45 @@ def run_jupyter():
     except KeyboardInterrupt:
         print("\n⏹️ Jupyter Notebook已停止")
 
+# 状态检查的目录文件数缓存：{目录: (目录修改时间, 文件数)}，以JSON保存
+STATUS_CACHE_FILE = Path(".status_cache.json")
+
+def _load_status_cache():
+    """读取目录文件数缓存，文件不存在或损坏时返回空缓存"""
+    try:
+        with open(STATUS_CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        # JSON中元组保存为列表，读取时还原并丢弃格式不符的条目
+        return {key: (value[0], value[1]) for key, value in cache.items()
+                if isinstance(value, list) and len(value) == 2}
+    except Exception:
+        return {}
+
+def _save_status_cache(cache):
+    """保存目录文件数缓存，写入失败不影响状态显示"""
+    try:
+        with open(STATUS_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False)
+    except Exception:
+        pass
+
+def _count_dir_entries(dir_path, cache):
+    """
+    统计目录下的条目数
+    
+    目录中增删文件会更新目录的修改时间，修改时间未变时直接复用缓存的计数，
+    否则用os.scandir计数（不构造Path对象和列表）并更新缓存
+    """
+    key = str(dir_path)
+    mtime = os.stat(dir_path).st_mtime_ns
+    cached = cache.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with os.scandir(dir_path) as entries:
+        count = sum(1 for _ in entries)
+    cache[key] = (mtime, count)
+    return count
+
 def show_status():
     """显示系统状态"""
     print("📊 MPPT数据采集与可视化系统状态")
@@ -173,9 +263,10 @@ def show_status():
     for file in files_to_check:
         if os.path.exists(file):
             try:
-                # 检查文件编码
-                with open(file, 'r', encoding='utf-8') as f:
-                    f.read(100)  # 尝试读取前100个字符
+                # 检查文件编码：以二进制读取文件开头再按UTF-8解码，
+                # 增量解码器允许末尾被截断的多字节字符
+                with open(file, 'rb') as f:
+                    codecs.getincrementaldecoder('utf-8')().decode(f.read(100), final=False)
                 print(f"  ✅ {file} (UTF-8编码)")
             except UnicodeDecodeError:
                 print(f"  ⚠️ {file} (编码问题)")
@@ -185,26 +276,25 @@ def show_status():
             print(f"  ❌ {file} (缺失)")
     
     print("\n📁 数据目录状态:")
+    status_cache = _load_status_cache()
     data_dirs = ["十五舍", "专教"]
+    sub_dirs = ["filtered", "raw_20250314", "raw_20250617", "Climate_data"]
     for dir_name in data_dirs:
-        dir_path = Path(dir_name)
-        if dir_path.exists():
+        if os.path.isdir(dir_name):
             print(f"  ✅ {dir_name}/")
-            # 检查子目录
-            sub_dirs = ["filtered", "raw_20250314", "raw_20250617", "Climate_data"]
+            # 检查子目录：一次scandir读出全部子项，再按名称查找
+            with os.scandir(dir_name) as entries:
+                children = {entry.name: entry for entry in entries}
             for sub_dir in sub_dirs:
-                sub_path = dir_path / sub_dir
-                if sub_path.exists():
-                    file_count = len(list(sub_path.glob("*")))
+                entry = children.get(sub_dir)
+                if entry is not None and entry.is_dir():
+                    file_count = _count_dir_entries(entry.path, status_cache)
                     print(f"    ✅ {sub_dir}/ ({file_count} 文件)")
                 else:
                     print(f"    ❌ {sub_dir}/ (缺失)")
         else:
             print(f"  ❌ {dir_name}/ (缺失)")
-    
-    print("\n🐍 Python环境:")
-    print(f"  Python版本: {sys.version}")
-    print(f"  当前目录: {os.getcwd()}")
+    _save_status_cache(status_cache)
 
 def create_config_template():
     """创建配置文件模板"""
@@ -234,17 +324,23 @@ def create_config_template():
         }
     }
     
-    import json
-    with open("config.json", "w", encoding="utf-8") as f:
-        json.dump(config_template, f, indent=2, ensure_ascii=False)
+    try:
+        import orjson
+        Path("config.json").write_bytes(orjson.dumps(config_template, option=orjson.OPT_INDENT_2))
+    except ImportError:
+        # 未安装orjson时回退到标准库json
+        with open("config.json", "w", encoding="utf-8") as f:
+            json.dump(config_template, f, indent=2, ensure_ascii=False)
     
     print("✅ 配置文件模板已创建: config.json")
     print("📝 请编辑config.json文件，填入您的API密钥等信息")
 
-def main():
-    """主函数"""
+@functools.lru_cache(maxsize=1)
+def _build_parser():
+    """构建命令行解析器（进程内只构建一次）"""
     parser = argparse.ArgumentParser(
         description="MPPT数据采集与可视化系统",
+        allow_abbrev=False,
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 使用示例:
@@ -259,29 +355,40 @@ def main():
     )
     
     subparsers = parser.add_subparsers(dest="command", help="可用命令")
+    # 所有子命令统一关闭选项前缀缩写匹配
+    add_command = functools.partial(subparsers.add_parser, allow_abbrev=False)
     
     # 安装命令
-    subparsers.add_parser("install", help="安装依赖包")
+    add_command("install", help="安装依赖包")
     
     # 数据采集器命令
-    collector_parser = subparsers.add_parser("collector", help="启动数据采集器")
+    collector_parser = add_command("collector", help="启动数据采集器")
     collector_parser.add_argument("--config", help="配置文件路径")
     collector_parser.add_argument("--once", action="store_true", help="只执行一次采集")
     collector_parser.add_argument("--location", help="指定采集位置")
     collector_parser.add_argument("--type", help="指定数据类型（mppt/weather）")
     
     # 可视化器命令
-    subparsers.add_parser("visualizer", help="启动交互式可视化界面")
+    add_command("visualizer", help="启动交互式可视化界面")
     
     # Jupyter命令
-    subparsers.add_parser("jupyter", help="启动Jupyter Notebook")
+    add_command("jupyter", help="启动Jupyter Notebook")
     
     # 状态命令
-    subparsers.add_parser("status", help="查看系统状态")
+    add_command("status", help="查看系统状态")
     
     # 配置命令
-    subparsers.add_parser("config", help="创建配置文件模板")
+    add_command("config", help="创建配置文件模板")
+    
+    return parser
+
+def main():
+    """主函数"""
+    # 输出含中文和emoji，统一设为UTF-8，避免在GBK等控制台上编码失败
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8")
     
+    parser = _build_parser()
     args = parser.parse_args()
     
     if not args.command:
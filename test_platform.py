@@ -5,9 +5,8 @@ MPPT可视化平台测试脚本
 
 import sys
 import os
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 def test_imports():
@@ -23,34 +22,47 @@ def test_imports():
         print(f"❌ 导入错误: {e}")
         return False
 
+def probe_data_dir(path):
+    """
+    检查数据目录，返回 (是否存在, xlsx文件数, 第一个文件名)
+    
+    逐个遍历目录下的xlsx文件计数，不构造完整的文件列表
+    """
+    if not path.exists():
+        return False, 0, None
+    files = path.glob("*.xlsx")
+    first = next(files, None)
+    if first is None:
+        return True, 0, None
+    return True, 1 + sum(1 for _ in files), first.name
+
 def test_data_structure():
     """测试数据结构和文件路径"""
     base_path = Path(".")
     locations = ["十五舍", "专教"]
     
-    print("\n📁 数据结构检查:")
+    # 各位置的MPPT/气象目录相互独立，并行检查（网络存储上可重叠各目录的IO等待），再按顺序输出
+    paths = []
     for location in locations:
-        mppt_path = base_path / location / "filtered"
-        weather_path = base_path / location / "Climate_data" / "filtered"
-        
+        paths.append(base_path / location / "filtered")
+        paths.append(base_path / location / "Climate_data" / "filtered")
+    with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+        results = list(executor.map(probe_data_dir, paths))
+    
+    print("\n📁 数据结构检查:")
+    for i, location in enumerate(locations):
         print(f"\n📍 {location}:")
-        print(f"  MPPT数据路径: {mppt_path}")
-        print(f"  MPPT数据存在: {'✅' if mppt_path.exists() else '❌'}")
-        
-        if mppt_path.exists():
-            files = list(mppt_path.glob("*.xlsx"))
-            print(f"  MPPT文件数量: {len(files)}")
-            if files:
-                print(f"  示例文件: {files[0].name}")
-        
-        print(f"  气象数据路径: {weather_path}")
-        print(f"  气象数据存在: {'✅' if weather_path.exists() else '❌'}")
-        
-        if weather_path.exists():
-            files = list(weather_path.glob("*.xlsx"))
-            print(f"  气象文件数量: {len(files)}")
-            if files:
-                print(f"  示例文件: {files[0].name}")
+        for label, path, (exists, file_count, first_name) in (
+            ("MPPT", paths[2 * i], results[2 * i]),
+            ("气象", paths[2 * i + 1], results[2 * i + 1]),
+        ):
+            print(f"  {label}数据路径: {path}")
+            print(f"  {label}数据存在: {'✅' if exists else '❌'}")
+            
+            if exists:
+                print(f"  {label}文件数量: {file_count}")
+                if first_name:
+                    print(f"  示例文件: {first_name}")
 
 def test_visualizer_class():
     """测试可视化器类的初始化"""
@@ -75,26 +87,34 @@ def test_visualizer_class():
 
 def test_sample_data():
     """测试样本数据读取"""
+    # pandas/numpy只在生成样本数据时使用，延迟导入以加快脚本启动
+    import pandas as pd
+    import numpy as np
+    
     try:
         print("\n📊 样本数据测试:")
         
         # 创建测试数据
         test_dates = pd.date_range(start='2025-01-01', end='2025-01-07', freq='H')
         
+        # 一次生成全部6列标准正态随机数，再按各列的均值和标准差缩放（固定种子，结果可复现）
+        rng = np.random.default_rng(0)
+        z = rng.standard_normal((len(test_dates), 6))
+        
         # 模拟MPPT数据
         mppt_data = pd.DataFrame({
             'eventTime': test_dates,
-            'power': np.random.normal(1000, 200, len(test_dates)),
-            'voltage': np.random.normal(24, 2, len(test_dates)),
-            'current': np.random.normal(42, 5, len(test_dates))
+            'power': z[:, 0] * 200 + 1000,
+            'voltage': z[:, 1] * 2 + 24,
+            'current': z[:, 2] * 5 + 42
         })
         
         # 模拟气象数据
         weather_data = pd.DataFrame({
             'Date': test_dates,
-            '大气温度(℃)': np.random.normal(25, 5, len(test_dates)),
-            '大气湿度(%RH)': np.random.normal(60, 10, len(test_dates)),
-            '数字气压(hPa)': np.random.normal(1013, 5, len(test_dates))
+            '大气温度(℃)': z[:, 3] * 5 + 25,
+            '大气湿度(%RH)': z[:, 4] * 10 + 60,
+            '数字气压(hPa)': z[:, 5] * 5 + 1013
         })
         
         print(f"✅ 模拟MPPT数据: {len(mppt_data)} 条记录")
@@ -8,6 +8,25 @@ import numpy as np
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 
+@st.cache_data(ttl=3600)
+def generate_sample_data(start_date, end_date):
+    """
+    生成示例数据：按小时的功率、温度序列及10行示例表格
+    
+    按日期范围缓存，切换位置或勾选框等与日期无关的操作不会重新生成
+    """
+    # 固定种子，重跑时图表数据保持一致
+    rng = np.random.default_rng(0)
+    dates = pd.date_range(start_date, end_date, freq='H')
+    power_data = rng.normal(1000, 200, len(dates))
+    temp_data = rng.normal(25, 5, len(dates))
+    sample_data = pd.DataFrame({
+        'time': pd.date_range(start_date, periods=10, freq='H'),
+        'power': rng.normal(1000, 100, 10),
+        'temperature': rng.normal(25, 3, 10)
+    })
+    return dates, power_data, temp_data, sample_data
+
 def main():
     st.set_page_config(
         page_title="MPPT测试平台",
@@ -31,6 +50,8 @@ def main():
     show_mppt = st.sidebar.checkbox("显示MPPT数据", True)
     show_weather = st.sidebar.checkbox("显示气象数据", True)
     
+    dates, power_data, temp_data, sample_data = generate_sample_data(start_date, end_date)
+    
     # 主内容区
     st.write(f"### 📊 {location} 数据分析")
     
@@ -49,10 +70,6 @@ def main():
     if show_mppt:
         st.write("#### ⚡ MPPT功率数据")
         
-        # 生成示例数据
-        dates = pd.date_range(start_date, end_date, freq='H')
-        power_data = np.random.normal(1000, 200, len(dates))
-        
         fig = go.Figure()
         fig.add_trace(go.Scatter(x=dates, y=power_data, mode='lines', name='功率'))
         fig.update_layout(title=f"{location} MPPT功率变化", xaxis_title="时间", yaxis_title="功率(W)")
@@ -62,10 +79,6 @@ def main():
     if show_weather:
         st.write("#### 🌤️ 气象数据")
         
-        # 生成示例数据
-        dates = pd.date_range(start_date, end_date, freq='H')
-        temp_data = np.random.normal(25, 5, len(dates))
-        
         fig = go.Figure()
         fig.add_trace(go.Scatter(x=dates, y=temp_data, mode='lines', name='温度', line=dict(color='red')))
         fig.update_layout(title=f"{location} 环境温度变化", xaxis_title="时间", yaxis_title="温度(°C)")
@@ -74,11 +87,6 @@ def main():
     
     # 简单的数据表格
     with st.expander("📋 示例数据表格"):
-        sample_data = pd.DataFrame({
-            'time': pd.date_range(start_date, periods=10, freq='H'),
-            'power': np.random.normal(1000, 100, 10),
-            'temperature': np.random.normal(25, 3, 10)
-        })
         st.dataframe(sample_data)
     
     st.success("✅ 平台运行正常！如果您看到这条消息，说明基本功能没有问题。")